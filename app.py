@@ -2,13 +2,91 @@ from __future__ import annotations
 
 from pathlib import Path
 
+import numpy as np
 import streamlit as st
 
-from gamblers_ruin.analytics import average_steps, estimated_goal_probability, ruin_count, success_count
-from gamblers_ruin.dashboard import build_dashboard
-from gamblers_ruin.simulation import run_gamblers_ruin
+from gamblers_ruin.analytics import (
+    average_steps,
+    estimated_goal_probability,
+    ruin_count,
+    success_count,
+    theoretical_expected_steps,
+)
+from gamblers_ruin.dashboard import build_dashboard_html
+from gamblers_ruin.models import SimulationResult
+from gamblers_ruin.simulation import merge_results, run_gamblers_ruin
 from gamblers_ruin.visualization import build_figure
 
+# Chunks are sized by expected steps, not trials, so progress shows up every second or two
+# even when a single walk takes hundreds of thousands of steps.
+CHUNK_STEPS = 2_000_000
+MAX_CHUNKS = 1000
+MAX_CHUNK_TRIALS = 5000
+
+
+@st.cache_data(max_entries=2 * MAX_CHUNKS, show_spinner=False)
+def simulate_chunk(
+    start_money: int,
+    goal: int,
+    win_probability: float,
+    trials: int,
+    num_paths_to_capture: int,
+    seed: int,
+    chunk: int,
+) -> SimulationResult:
+    return run_gamblers_ruin(
+        start_money=start_money,
+        goal=goal,
+        win_probability=win_probability,
+        trials=trials,
+        num_paths_to_capture=num_paths_to_capture,
+        rng=np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(chunk,))),
+    )
+
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def dashboard_html(
+    start_money: int,
+    goal: int,
+    win_probability: float,
+    trials: int,
+    paths: int,
+    seed: int,
+) -> bytes:
+    result = merge_results(
+        [
+            simulate_chunk(start_money, goal, win_probability, chunk_trials, chunk_paths, seed, chunk)
+            for chunk, (chunk_trials, chunk_paths) in enumerate(
+                chunk_plan(start_money, goal, win_probability, trials, paths)
+            )
+        ]
+    )
+    return build_dashboard_html(result, start_money, goal, win_probability).encode("utf-8")
+
+
+def chunk_plan(
+    start_money: int,
+    goal: int,
+    win_probability: float,
+    trials: int,
+    paths: int,
+) -> list[tuple[int, int]]:
+    expected_steps = max(theoretical_expected_steps(start_money, goal, win_probability), 1.0)
+    size = int(min(max(CHUNK_STEPS // expected_steps, -(-trials // MAX_CHUNKS), 1), MAX_CHUNK_TRIALS))
+    plan = []
+    for first in range(0, trials, size):
+        chunk_trials = min(size, trials - first)
+        plan.append((chunk_trials, max(0, min(paths - first, chunk_trials))))
+    return plan
+
+
+def show_metrics(container, result: SimulationResult) -> None:
+    metric_cols = container.columns(4)
+    metric_cols[0].metric("Estimated P(reach goal)", f"{estimated_goal_probability(result):.4f}")
+    metric_cols[1].metric("Average steps", f"{average_steps(result):,.1f}")
+    metric_cols[2].metric("Reached goal", f"{success_count(result):,}")
+    metric_cols[3].metric("Ruined", f"{ruin_count(result):,}")
+
 
 st.set_page_config(page_title="Gambler's Ruin Simulator", layout="wide")
 
@@ -22,51 +100,56 @@ with st.sidebar:
     win_probability = st.slider("Win probability", min_value=0.0, max_value=1.0, value=0.5, step=0.001)
     trials = st.number_input("Trials", min_value=1, value=10000, step=100)
     paths = st.number_input("Sample paths", min_value=0, max_value=int(trials), value=min(30, int(trials)), step=1)
+    seed = st.number_input("Seed", min_value=0, value=0, step=1, help="Same parameters and seed reuse cached results")
     output_name = st.text_input("Export HTML filename", value="gamblers_ruin_dashboard.html")
 
-run = st.button("Run Simulation", type="primary", use_container_width=True)
-
-if run:
-    result = run_gamblers_ruin(
-        start_money=int(start_money),
-        goal=int(goal),
-        win_probability=float(win_probability),
-        trials=int(trials),
-        num_paths_to_capture=int(paths),
+if st.button("Run Simulation", type="primary", use_container_width=True):
+    st.session_state["run_params"] = (
+        int(start_money),
+        int(goal),
+        float(win_probability),
+        int(trials),
+        int(paths),
+        int(seed),
     )
 
-    metric_cols = st.columns(4)
-    metric_cols[0].metric("Estimated P(reach goal)", f"{estimated_goal_probability(result):.4f}")
-    metric_cols[1].metric("Average steps", f"{average_steps(result):,.1f}")
-    metric_cols[2].metric("Reached goal", f"{success_count(result):,}")
-    metric_cols[3].metric("Ruined", f"{ruin_count(result):,}")
+run_params = st.session_state.get("run_params")
+if run_params is not None:
+    run_start, run_goal, run_p, run_trials, run_paths, run_seed = run_params
+    plan = chunk_plan(run_start, run_goal, run_p, run_trials, run_paths)
+
+    metrics_area = st.empty()
+    progress = st.progress(0.0, text="Simulating...") if len(plan) > 1 else None
+    chunks: list[SimulationResult] = []
+    for chunk, (chunk_trials, chunk_paths) in enumerate(plan):
+        chunks.append(simulate_chunk(run_start, run_goal, run_p, chunk_trials, chunk_paths, run_seed, chunk))
+        if progress is not None:
+            done = sum(len(part.success) for part in chunks)
+            progress.progress(done / run_trials, text=f"Simulated {done:,} of {run_trials:,} trials")
+            show_metrics(metrics_area.container(), merge_results(chunks))
+    if progress is not None:
+        progress.empty()
+
+    result = merge_results(chunks)
+    show_metrics(metrics_area.container(), result)
 
     fig = build_figure(
         result=result,
-        start_money=int(start_money),
-        goal=int(goal),
-        win_probability=float(win_probability),
+        start_money=run_start,
+        goal=run_goal,
+        win_probability=run_p,
     )
     st.plotly_chart(fig, use_container_width=True)
 
-    output_path = Path(output_name)
-    build_dashboard(
-        result=result,
-        start_money=int(start_money),
-        goal=int(goal),
-        win_probability=float(win_probability),
-        output_file=output_path,
-    )
-
-    with output_path.open("rb") as f:
+    if st.button("Prepare HTML dashboard", use_container_width=True):
+        st.session_state["export_params"] = run_params
+    if st.session_state.get("export_params") == run_params:
         st.download_button(
             label="Download HTML dashboard",
-            data=f.read(),
-            file_name=output_path.name,
+            data=dashboard_html(*run_params),
+            file_name=Path(output_name).name,
             mime="text/html",
             use_container_width=True,
         )
-
-    st.success(f"Saved dashboard to {output_path.resolve()}")
 else:
     st.info("Set parameters in the sidebar and click Run Simulation.")
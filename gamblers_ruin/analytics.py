@@ -18,32 +18,84 @@ def success_count(result: SimulationResult) -> int:
 
 
 def ruin_count(result: SimulationResult) -> int:
-    return int((~result.success).sum())
+    return int((~result.success & ~result.censored).sum())
+
+
+def censored_count(result: SimulationResult) -> int:
+    return int(result.censored.sum())
+
+
+def goal_probability_bounds(result: SimulationResult) -> tuple[float, float]:
+    # A censored trial may still end either way, so count it as ruined for the lower
+    # bound and as reaching the goal for the upper bound.
+    trials = len(result.success)
+    wins = success_count(result)
+    return wins / trials, (wins + censored_count(result)) / trials
+
+
+def bounds_error(lower: float, upper: float, theoretical_probability: float) -> float:
+    # How far the closed form lies outside the range the estimate must fall in. Without
+    # censored trials the range is a single point and this is the plain absolute error.
+    return max(lower - theoretical_probability, theoretical_probability - upper, 0.0)
 
 
 def probability_convergence(result: SimulationResult) -> np.ndarray:
     return np.cumsum(result.success) / np.arange(1, len(result.success) + 1)
 
 
-def theoretical_goal_probability(start_money: int, goal: int, win_probability: float) -> float:
-    if start_money <= 0 or goal <= start_money:
-        raise ValueError("Require 0 < start_money < goal")
-    if not (0.0 <= win_probability <= 1.0):
-        raise ValueError("win_probability must be in [0, 1]")
+def closed_form_goal_probability(start_money, goal, win_probability: float) -> np.ndarray:
+    # Works elementwise on scalars or broadcastable arrays; callers validate the inputs.
+    start_money = np.asarray(start_money, dtype=np.float64)
+    goal = np.asarray(goal, dtype=np.float64)
+    shape = np.broadcast(start_money, goal).shape
 
     if win_probability == 0.0:
-        return 0.0
+        return np.zeros(shape)
     if win_probability == 1.0:
-        return 1.0
+        return np.ones(shape)
 
     if np.isclose(win_probability, 0.5):
         return start_money / goal
 
-    loss_probability = 1.0 - win_probability
-    ratio = loss_probability / win_probability
-    numerator = 1.0 - ratio**start_money
-    denominator = 1.0 - ratio**goal
-    return numerator / denominator
+    ratio = (1.0 - win_probability) / win_probability
+    if ratio < 1.0:
+        return (1.0 - ratio**start_money) / (1.0 - ratio**goal)
+    # Same closed form divided through by ratio**goal so large goals cannot overflow.
+    inverse = 1.0 / ratio
+    return (inverse ** (goal - start_money) - inverse**goal) / (1.0 - inverse**goal)
+
+
+def closed_form_expected_steps(start_money, goal, win_probability: float) -> np.ndarray:
+    start_money = np.asarray(start_money, dtype=np.float64)
+    goal = np.asarray(goal, dtype=np.float64)
+
+    if win_probability == 0.0:
+        return np.broadcast_to(start_money, np.broadcast(start_money, goal).shape).copy()
+    if win_probability == 1.0:
+        return goal - start_money
+
+    if np.isclose(win_probability, 0.5):
+        return start_money * (goal - start_money)
+
+    drift = 2.0 * win_probability - 1.0
+    return (goal * closed_form_goal_probability(start_money, goal, win_probability) - start_money) / drift
+
+
+def _validate_closed_form_inputs(start_money: int, goal: int, win_probability: float) -> None:
+    if start_money <= 0 or goal <= start_money:
+        raise ValueError("Require 0 < start_money < goal")
+    if not (0.0 <= win_probability <= 1.0):
+        raise ValueError("win_probability must be in [0, 1]")
+
+
+def theoretical_goal_probability(start_money: int, goal: int, win_probability: float) -> float:
+    _validate_closed_form_inputs(start_money, goal, win_probability)
+    return float(closed_form_goal_probability(start_money, goal, win_probability))
+
+
+def theoretical_expected_steps(start_money: int, goal: int, win_probability: float) -> float:
+    _validate_closed_form_inputs(start_money, goal, win_probability)
+    return float(closed_form_expected_steps(start_money, goal, win_probability))
 
 
 def absolute_convergence_error(result: SimulationResult, theoretical_probability: float) -> np.ndarray:
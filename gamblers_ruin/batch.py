@@ -0,0 +1,330 @@
+from __future__ import annotations
+
+import csv
+import json
+import math
+import os
+from collections.abc import Callable
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from .analytics import bounds_error, theoretical_goal_probability
+from .models import SimulationResult
+from .simulation import run_gamblers_ruin
+
+DEFAULT_BATCH_TRIALS = 10000
+
+
+@dataclass(frozen=True)
+class Scenario:
+    name: str
+    start_money: int
+    goal: int
+    win_probability: float
+    trials: int
+    seed: int | None = None
+    max_steps_per_trial: int | None = None
+
+    def fingerprint(self) -> str:
+        return json.dumps(asdict(self), sort_keys=True)
+
+    def batch_sizes(self, batch_trials: int) -> list[int]:
+        full, remainder = divmod(self.trials, batch_trials)
+        return [batch_trials] * full + ([remainder] if remainder else [])
+
+
+@dataclass
+class TrialSummary:
+    trials: int = 0
+    successes: int = 0
+    censored: int = 0
+    steps_sum: int = 0
+    steps_sq_sum: float = 0.0
+    max_steps: int = 0
+
+    @classmethod
+    def from_result(cls, result: SimulationResult) -> TrialSummary:
+        steps = result.steps.astype(np.float64)
+        return cls(
+            trials=len(result.success),
+            successes=int(result.success.sum()),
+            censored=int(result.censored.sum()),
+            steps_sum=int(result.steps.sum()),
+            steps_sq_sum=float(np.dot(steps, steps)),
+            max_steps=int(result.steps.max()) if len(result.steps) else 0,
+        )
+
+    def merge(self, other: TrialSummary) -> None:
+        self.trials += other.trials
+        self.successes += other.successes
+        self.censored += other.censored
+        self.steps_sum += other.steps_sum
+        self.steps_sq_sum += other.steps_sq_sum
+        self.max_steps = max(self.max_steps, other.max_steps)
+
+
+def _optional_int(value: Any) -> int | None:
+    if value is None or (isinstance(value, str) and not value.strip()):
+        return None
+    return int(value)
+
+
+def _scenario_from_row(row: dict[str, Any], index: int) -> Scenario:
+    try:
+        scenario = Scenario(
+            name=str(row.get("name") or f"scenario-{index + 1}"),
+            start_money=int(row["start"]),
+            goal=int(row["goal"]),
+            win_probability=float(row["p"]),
+            trials=int(row["trials"]),
+            seed=_optional_int(row.get("seed")),
+            max_steps_per_trial=_optional_int(row.get("max_steps")),
+        )
+    except KeyError as exc:
+        raise ValueError(f"Manifest row {index + 1} is missing required field {exc.args[0]!r}") from exc
+
+    if scenario.start_money <= 0 or scenario.goal <= scenario.start_money:
+        raise ValueError(f"Scenario {scenario.name!r}: require 0 < start < goal")
+    if not (0.0 <= scenario.win_probability <= 1.0):
+        raise ValueError(f"Scenario {scenario.name!r}: p must be between 0 and 1")
+    if scenario.trials <= 0:
+        raise ValueError(f"Scenario {scenario.name!r}: trials must be > 0")
+    if scenario.max_steps_per_trial is not None and scenario.max_steps_per_trial <= 0:
+        raise ValueError(f"Scenario {scenario.name!r}: max_steps must be > 0")
+    return scenario
+
+
+def load_manifest(path: Path) -> list[Scenario]:
+    path = Path(path)
+    if path.suffix.lower() == ".csv":
+        with path.open(newline="") as f:
+            rows: list[dict[str, Any]] = list(csv.DictReader(f))
+    else:
+        data = json.loads(path.read_text())
+        rows = data["scenarios"] if isinstance(data, dict) else data
+
+    scenarios = [_scenario_from_row(row, index) for index, row in enumerate(rows)]
+    names = [scenario.name for scenario in scenarios]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        raise ValueError(f"Scenario names must be unique, duplicated: {', '.join(duplicates)}")
+    return scenarios
+
+
+def _run_trial_batch(scenario: Scenario, batch_index: int, trials: int) -> tuple[str, int, TrialSummary]:
+    # Seeding each batch from (seed, batch_index) makes resumed runs draw the same streams.
+    seed_sequence = np.random.SeedSequence(scenario.seed, spawn_key=(batch_index,))
+    result = run_gamblers_ruin(
+        start_money=scenario.start_money,
+        goal=scenario.goal,
+        win_probability=scenario.win_probability,
+        trials=trials,
+        num_paths_to_capture=0,
+        max_steps_per_trial=scenario.max_steps_per_trial,
+        rng=np.random.default_rng(seed_sequence),
+    )
+    return scenario.name, batch_index, TrialSummary.from_result(result)
+
+
+def scenario_row(scenario: Scenario, summary: TrialSummary) -> dict[str, Any]:
+    empirical = summary.successes / summary.trials
+    upper_bound = (summary.successes + summary.censored) / summary.trials
+    theoretical = theoretical_goal_probability(scenario.start_money, scenario.goal, scenario.win_probability)
+    mean_steps = summary.steps_sum / summary.trials
+    variance = max(summary.steps_sq_sum / summary.trials - mean_steps**2, 0.0)
+    return {
+        "name": scenario.name,
+        "start": scenario.start_money,
+        "goal": scenario.goal,
+        "p": scenario.win_probability,
+        "trials": summary.trials,
+        "successes": summary.successes,
+        "censored": summary.censored,
+        "empirical": empirical,
+        "theoretical": theoretical,
+        "error": bounds_error(empirical, upper_bound, theoretical),
+        "avg_steps": mean_steps,
+        "std_steps": math.sqrt(variance),
+        "max_steps": summary.max_steps,
+    }
+
+
+def _append_line(handle, line: str) -> None:
+    handle.write(line + "\n")
+    handle.flush()
+    os.fsync(handle.fileno())
+
+
+def _drop_partial_line(path: Path) -> None:
+    # A crash mid-write leaves a row without its newline. Cut it off so it is not read back
+    # as finished and the next append does not get glued onto it.
+    if not path.exists():
+        return
+    with path.open("rb+") as f:
+        data = f.read()
+        if not data or data.endswith(b"\n"):
+            return
+        f.truncate(data.rfind(b"\n") + 1)
+
+
+def _completed_scenarios(output_file: Path) -> set[str]:
+    if not output_file.exists():
+        return set()
+    with output_file.open(newline="") as f:
+        if output_file.suffix.lower() == ".csv":
+            return {row["name"] for row in csv.DictReader(f) if row.get("name")}
+        names = set()
+        for line in f:
+            try:
+                names.add(json.loads(line)["name"])
+            except (json.JSONDecodeError, KeyError, TypeError):
+                continue
+        return names
+
+
+def _load_checkpoint(
+    checkpoint_file: Path,
+    scenarios: dict[str, Scenario],
+    batch_trials: int,
+) -> tuple[dict[str, dict[int, TrialSummary]], dict[str, str]]:
+    done: dict[str, dict[int, TrialSummary]] = {name: {} for name in scenarios}
+    # Fingerprint of the scenario each results row was written for, keyed by name.
+    finished: dict[str, str] = {}
+    if not checkpoint_file.exists():
+        return done, finished
+    with checkpoint_file.open() as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A crash can leave the last line half written; that batch simply reruns.
+                continue
+            if record.get("done"):
+                finished[record["scenario"]] = record["fingerprint"]
+                continue
+            scenario = scenarios.get(record["scenario"])
+            if scenario is None or record["fingerprint"] != scenario.fingerprint():
+                continue
+            if record["batch_trials"] != batch_trials:
+                continue
+            done[scenario.name][record["batch"]] = TrialSummary(**record["summary"])
+    return done, finished
+
+
+def _finished_scenarios(
+    output_file: Path,
+    scenarios: list[Scenario],
+    finished_fingerprints: dict[str, str],
+) -> set[str]:
+    # A row only counts as finished for the scenario it was written for. Rows cannot be
+    # replaced in an append-only file, so a row left over from an edited manifest entry is
+    # an error rather than something to silently keep or duplicate.
+    rows = _completed_scenarios(output_file)
+    stale = [
+        scenario.name
+        for scenario in scenarios
+        if scenario.name in rows and finished_fingerprints.get(scenario.name) != scenario.fingerprint()
+    ]
+    if stale:
+        raise ValueError(
+            f"{output_file} has rows for scenarios that no longer match the manifest: {', '.join(stale)}. "
+            "Remove those rows or write to a new output file."
+        )
+    return {scenario.name for scenario in scenarios if scenario.name in rows}
+
+
+def run_batch(
+    scenarios: list[Scenario],
+    output_file: Path,
+    workers: int = 1,
+    batch_trials: int = DEFAULT_BATCH_TRIALS,
+    checkpoint_file: Path | None = None,
+    on_scenario_done: Callable[[dict[str, Any]], None] | None = None,
+) -> int:
+    output_file = Path(output_file)
+    checkpoint_file = checkpoint_file or output_file.with_name(output_file.name + ".checkpoint.jsonl")
+    by_name = {scenario.name: scenario for scenario in scenarios}
+
+    _drop_partial_line(output_file)
+    _drop_partial_line(checkpoint_file)
+    batches_done, finished_fingerprints = _load_checkpoint(checkpoint_file, by_name, batch_trials)
+    finished = _finished_scenarios(output_file, scenarios, finished_fingerprints)
+    pending = [scenario for scenario in scenarios if scenario.name not in finished]
+
+    write_csv_header = output_file.suffix.lower() == ".csv" and (
+        not output_file.exists() or output_file.stat().st_size == 0
+    )
+    completed_now = 0
+    with output_file.open("a", newline="") as output, checkpoint_file.open("a") as checkpoint:
+        csv_writer: csv.DictWriter | None = None
+
+        def write_row(row: dict[str, Any]) -> None:
+            nonlocal csv_writer, write_csv_header
+            if output_file.suffix.lower() == ".csv":
+                if csv_writer is None:
+                    csv_writer = csv.DictWriter(output, fieldnames=list(row))
+                if write_csv_header:
+                    csv_writer.writeheader()
+                    write_csv_header = False
+                csv_writer.writerow(row)
+                output.flush()
+                os.fsync(output.fileno())
+            else:
+                _append_line(output, json.dumps(row))
+            if on_scenario_done is not None:
+                on_scenario_done(row)
+
+        def finish_if_complete(scenario: Scenario) -> None:
+            nonlocal completed_now
+            if len(batches_done[scenario.name]) < len(scenario.batch_sizes(batch_trials)):
+                return
+            summary = TrialSummary()
+            for _, batch_summary in sorted(batches_done[scenario.name].items()):
+                summary.merge(batch_summary)
+            # Recorded before the row, so a crash in between only means the row is written again.
+            _append_line(
+                checkpoint,
+                json.dumps({"scenario": scenario.name, "fingerprint": scenario.fingerprint(), "done": True}),
+            )
+            write_row(scenario_row(scenario, summary))
+            completed_now += 1
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = set()
+            for scenario in pending:
+                for batch_index, trials in enumerate(scenario.batch_sizes(batch_trials)):
+                    if batch_index not in batches_done[scenario.name]:
+                        futures.add(executor.submit(_run_trial_batch, scenario, batch_index, trials))
+                # Scenarios whose batches were all checkpointed before a crash only need their row.
+                finish_if_complete(scenario)
+
+            try:
+                while futures:
+                    done, futures = wait(futures, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        name, batch_index, summary = future.result()
+                        scenario = by_name[name]
+                        batches_done[name][batch_index] = summary
+                        _append_line(
+                            checkpoint,
+                            json.dumps(
+                                {
+                                    "scenario": name,
+                                    "fingerprint": scenario.fingerprint(),
+                                    "batch": batch_index,
+                                    "batch_trials": batch_trials,
+                                    "summary": asdict(summary),
+                                }
+                            ),
+                        )
+                        finish_if_complete(scenario)
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
+
+    return completed_now
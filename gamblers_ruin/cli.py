@@ -1,6 +1,8 @@
 from __future__ import annotations
 
 import argparse
+import os
+from collections.abc import Sequence
 from pathlib import Path
 
 
@@ -16,11 +18,48 @@ def parse_args() -> argparse.Namespace:
         default=20,
         help="How many full bankroll paths to draw in the dashboard",
     )
+    parser.add_argument("--seed", type=int, default=None, help="Seed for reproducible runs (default: random)")
+    parser.add_argument(
+        "--path-sampling",
+        choices=["first", "reservoir", "longest", "stratified"],
+        default="first",
+        help="Which trials' paths to keep: the first N, a uniform reservoir, the N longest, or successes and ruins evenly",
+    )
+    parser.add_argument(
+        "--strategy",
+        choices=["unit", "fixed-fraction", "kelly", "martingale", "bold"],
+        default="unit",
+        help="Stake rule; anything other than unit runs on the vectorized strategy engine",
+    )
+    parser.add_argument(
+        "--stake-fraction",
+        type=float,
+        default=0.1,
+        help="Share of the bankroll staked each round by the fixed-fraction strategy",
+    )
+    parser.add_argument(
+        "--base-stake",
+        type=int,
+        default=1,
+        help="Opening stake of the martingale strategy",
+    )
+    parser.add_argument(
+        "--max-steps",
+        type=int,
+        default=None,
+        help="Stop each trial after this many steps and mark it as censored",
+    )
+    parser.add_argument(
+        "--step-budget",
+        type=int,
+        default=None,
+        help="Stop the whole run after this many total steps; the interrupted trial is censored",
+    )
     parser.add_argument(
         "--target-goals",
         type=str,
         default="",
-        help="Comma-separated goals for configuration comparison in Flask dashboard (e.g., 40,50,60)",
+        help="Comma-separated goals for configuration comparison in Flask dashboard (e.g., 40,50,60; at most 10)",
     )
     parser.add_argument(
         "--no-open-browser",
@@ -33,6 +72,12 @@ def parse_args() -> argparse.Namespace:
         default=Path("gamblers_ruin_dashboard.html"),
         help="Output HTML dashboard path",
     )
+    parser.add_argument(
+        "--export",
+        type=Path,
+        default=None,
+        help="Stream per-trial results and sample paths to a .csv, .npy or .arrow file while simulating",
+    )
     parser.add_argument(
         "--host",
         type=str,
@@ -50,9 +95,174 @@ def parse_args() -> argparse.Namespace:
         action="store_true",
         help="Do not start the Flask dashboard server",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of prefork server worker processes (values above 1 require gunicorn)",
+    )
+    parser.add_argument(
+        "--result-store",
+        type=Path,
+        default=None,
+        help="SQLite file used to share simulation results between server workers",
+    )
+    parser.add_argument(
+        "--request-timeout",
+        type=float,
+        default=None,
+        help="Seconds a dashboard request may wait for its simulation before it is abandoned (default: no limit)",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Print a per-stage timing breakdown of the dashboard build",
+    )
+    parser.add_argument(
+        "--profile-output",
+        type=Path,
+        default=None,
+        help="Also write cProfile statistics of the dashboard build to this file (implies --profile)",
+    )
+    parser.add_argument(
+        "--theory-table",
+        type=Path,
+        default=None,
+        help="Serve /api/theory lookups from a table made with the build-theory-table subcommand",
+    )
     return parser.parse_args()
 
 
+def parse_theory_table_args(argv: Sequence[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="gamblersruin.py build-theory-table",
+        description="Precompute closed-form goal probabilities and expected durations into a memory-mapped table",
+    )
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=Path("gamblers_ruin_theory.npy"),
+        help="Output .npy table path",
+    )
+    parser.add_argument("--max-goal", type=int, default=100, help="Largest goal bankroll stored in the table")
+    parser.add_argument(
+        "--p-points",
+        type=int,
+        default=201,
+        help="Number of evenly spaced win probabilities in [0, 1] stored in the table",
+    )
+    return parser.parse_args(argv)
+
+
+def parse_batch_args(argv: Sequence[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="gamblersruin.py batch",
+        description="Run a JSON/CSV manifest of scenarios with checkpointing and resume",
+    )
+    parser.add_argument("manifest", type=Path, help="JSON list or CSV of scenarios (name,start,goal,p,trials,seed,max_steps)")
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=Path("gamblers_ruin_batch.jsonl"),
+        help="Results file, one row per finished scenario (.jsonl or .csv)",
+    )
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes")
+    parser.add_argument(
+        "--batch-trials",
+        type=int,
+        default=10000,
+        help="Trials per checkpointed batch; keep it unchanged when resuming",
+    )
+    parser.add_argument(
+        "--checkpoint",
+        type=Path,
+        default=None,
+        help="Checkpoint file for finished trial batches (default: <output>.checkpoint.jsonl)",
+    )
+    return parser.parse_args(argv)
+
+
+def parse_verify_engines_args(argv: Sequence[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="gamblersruin.py verify-engines",
+        description="Check that the fast engines sample the same distribution as the reference loop",
+    )
+    parser.add_argument("--trials", type=int, default=20000, help="Trials per engine and parameter cell")
+    parser.add_argument(
+        "--alpha",
+        type=float,
+        default=0.001,
+        help="Family-wise false-failure rate across every check in the suite",
+    )
+    parser.add_argument("--seed", type=int, default=None, help="Seed for reproducible runs (default: random)")
+    return parser.parse_args(argv)
+
+
+def parse_coordinator_args(argv: Sequence[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="gamblersruin.py coordinator",
+        description="Shard a scenario manifest across worker hosts and merge their results",
+    )
+    parser.add_argument("manifest", type=Path, help="JSON list or CSV of scenarios (name,start,goal,p,trials,seed,max_steps)")
+    parser.add_argument(
+        "--host",
+        type=str,
+        default="127.0.0.1",
+        help="Interface the coordinator listens on; use 0.0.0.0 to accept remote workers",
+    )
+    parser.add_argument("--port", type=int, default=50555, help="Port the coordinator listens on")
+    parser.add_argument(
+        "--authkey",
+        type=str,
+        required=True,
+        help="Shared secret workers must present; anyone holding it can run code on the coordinator",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Root seed for scenarios without their own seed")
+    parser.add_argument("--shard-trials", type=int, default=10000, help="Trials per shard handed to a worker")
+    parser.add_argument(
+        "--lease-timeout",
+        type=float,
+        default=300.0,
+        help="Seconds without a heartbeat before a shard is handed to another worker",
+    )
+    parser.add_argument(
+        "--max-attempts",
+        type=int,
+        default=3,
+        help="Leases a shard may lose without a single heartbeat before the run fails",
+    )
+    parser.add_argument(
+        "--local-workers",
+        type=int,
+        default=0,
+        help="Also start this many worker processes on the coordinator host",
+    )
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=Path("gamblers_ruin_distributed.jsonl"),
+        help="Results file, one JSON row per scenario",
+    )
+    return parser.parse_args(argv)
+
+
+def parse_worker_args(argv: Sequence[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="gamblersruin.py worker",
+        description="Run shards handed out by a coordinator",
+    )
+    parser.add_argument("--host", type=str, default="127.0.0.1", help="Coordinator host")
+    parser.add_argument("--port", type=int, default=50555, help="Coordinator port")
+    parser.add_argument(
+        "--authkey",
+        type=str,
+        required=True,
+        help="Shared secret of the coordinator; anyone holding it can run code on this worker",
+    )
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1, help="Worker processes on this host")
+    return parser.parse_args(argv)
+
+
 def validate_args(args: argparse.Namespace) -> None:
     if args.start <= 0:
         raise SystemExit("--start must be > 0")
@@ -66,5 +276,76 @@ def validate_args(args: argparse.Namespace) -> None:
         raise SystemExit("--trials must be <= 100000")
     if args.paths < 0:
         raise SystemExit("--paths cannot be negative")
+    if not (0.0 < args.stake_fraction <= 1.0):
+        raise SystemExit("--stake-fraction must be in (0, 1]")
+    if args.base_stake <= 0:
+        raise SystemExit("--base-stake must be > 0")
+    if args.strategy == "kelly" and args.p <= 0.5:
+        raise SystemExit("--strategy kelly needs an edge (--p > 0.5); without one it would stake nothing")
+    if args.strategy != "unit" and (args.step_budget is not None or args.export is not None):
+        raise SystemExit("--step-budget and --export are only available with --strategy unit")
+    if args.strategy != "unit" and args.path_sampling != "first":
+        raise SystemExit("--path-sampling is only available with --strategy unit")
+    if args.max_steps is not None and args.max_steps <= 0:
+        raise SystemExit("--max-steps must be > 0")
+    if args.step_budget is not None and args.step_budget <= 0:
+        raise SystemExit("--step-budget must be > 0")
+    if args.port <= 0 or args.port > 65535:
+        raise SystemExit("--port must be between 1 and 65535")
+    if args.workers <= 0:
+        raise SystemExit("--workers must be > 0")
+    if args.request_timeout is not None and args.request_timeout <= 0:
+        raise SystemExit("--request-timeout must be > 0")
+    if args.export is not None and args.export.suffix.lower() not in (".csv", ".npy", ".arrow"):
+        raise SystemExit("--export must end in .csv, .npy or .arrow")
+    if args.theory_table is not None and not args.theory_table.exists():
+        raise SystemExit(f"--theory-table file not found: {args.theory_table}")
+
+
+def validate_theory_table_args(args: argparse.Namespace) -> None:
+    if args.max_goal < 2:
+        raise SystemExit("--max-goal must be >= 2")
+    if args.p_points < 2:
+        raise SystemExit("--p-points must be >= 2")
+
+
+def validate_batch_args(args: argparse.Namespace) -> None:
+    if not args.manifest.exists():
+        raise SystemExit(f"Manifest not found: {args.manifest}")
+    if args.workers <= 0:
+        raise SystemExit("--workers must be > 0")
+    if args.batch_trials <= 0:
+        raise SystemExit("--batch-trials must be > 0")
+
+
+def validate_verify_engines_args(args: argparse.Namespace) -> None:
+    if args.trials < 100:
+        raise SystemExit("--trials must be >= 100")
+    if not (0.0 < args.alpha < 1.0):
+        raise SystemExit("--alpha must be between 0 and 1")
+
+
+def validate_coordinator_args(args: argparse.Namespace) -> None:
+    if not args.manifest.exists():
+        raise SystemExit(f"Manifest not found: {args.manifest}")
+    if not args.authkey:
+        raise SystemExit("--authkey cannot be empty")
+    if args.port < 0 or args.port > 65535:
+        raise SystemExit("--port must be between 0 and 65535")
+    if args.shard_trials <= 0:
+        raise SystemExit("--shard-trials must be > 0")
+    if args.lease_timeout <= 0:
+        raise SystemExit("--lease-timeout must be > 0")
+    if args.max_attempts <= 0:
+        raise SystemExit("--max-attempts must be > 0")
+    if args.local_workers < 0:
+        raise SystemExit("--local-workers cannot be negative")
+
+
+def validate_worker_args(args: argparse.Namespace) -> None:
+    if not args.authkey:
+        raise SystemExit("--authkey cannot be empty")
     if args.port <= 0 or args.port > 65535:
         raise SystemExit("--port must be between 1 and 65535")
+    if args.processes <= 0:
+        raise SystemExit("--processes must be > 0")
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections.abc import Callable, Hashable
+from typing import Any
+
+from .simulation import CancellationToken
+
+POLL_INTERVAL_SECONDS = 0.1
+
+
+class _Computation:
+    def __init__(self) -> None:
+        self.token = CancellationToken()
+        self.done = threading.Event()
+        self.waiters = 0
+        self.result: Any = None
+        self.error: BaseException | None = None
+
+
+class RequestCoalescer:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._inflight: dict[Hashable, _Computation] = {}
+
+    def inflight_count(self) -> int:
+        with self._lock:
+            return len(self._inflight)
+
+    def run(
+        self,
+        key: Hashable,
+        compute: Callable[[CancellationToken], Any],
+        deadline: float | None = None,
+        disconnected: Callable[[], bool] | None = None,
+    ) -> tuple[Any, bool]:
+        with self._lock:
+            computation = self._inflight.get(key)
+            coalesced = computation is not None
+            if computation is None:
+                computation = _Computation()
+                self._inflight[key] = computation
+                threading.Thread(
+                    target=self._execute,
+                    args=(key, computation, compute),
+                    daemon=True,
+                ).start()
+            computation.waiters += 1
+
+        try:
+            while not computation.done.wait(POLL_INTERVAL_SECONDS):
+                if disconnected is not None and disconnected():
+                    raise ConnectionAbortedError("Client disconnected before the simulation finished.")
+                if deadline is not None and time.monotonic() >= deadline:
+                    raise TimeoutError("Simulation did not finish before the request deadline.")
+        finally:
+            self._leave(key, computation)
+
+        if computation.error is not None:
+            raise computation.error
+        return computation.result, coalesced
+
+    def _leave(self, key: Hashable, computation: _Computation) -> None:
+        with self._lock:
+            computation.waiters -= 1
+            if computation.waiters == 0 and not computation.done.is_set():
+                # Nobody is left to receive the result, so stop burning CPU on it.
+                computation.token.cancel()
+                if self._inflight.get(key) is computation:
+                    del self._inflight[key]
+
+    def _execute(
+        self,
+        key: Hashable,
+        computation: _Computation,
+        compute: Callable[[CancellationToken], Any],
+    ) -> None:
+        try:
+            computation.result = compute(computation.token)
+        except BaseException as exc:
+            computation.error = exc
+        finally:
+            with self._lock:
+                if self._inflight.get(key) is computation:
+                    del self._inflight[key]
+            computation.done.set()
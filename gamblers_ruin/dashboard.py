@@ -2,21 +2,38 @@ from __future__ import annotations
 
 from pathlib import Path
 
+from .instrumentation import StageTimings, timed_stage
 from .models import SimulationResult
 from .visualization import build_figure
 
 
+def build_dashboard_html(
+    result: SimulationResult,
+    start_money: int,
+    goal: int,
+    win_probability: float,
+    timings: StageTimings | None = None,
+) -> str:
+    with timed_stage(timings, "build_figure"):
+        figure = build_figure(
+            result=result,
+            start_money=start_money,
+            goal=goal,
+            win_probability=win_probability,
+            timings=timings,
+        )
+    with timed_stage(timings, "to_html"):
+        return figure.to_html(include_plotlyjs="cdn", full_html=True)
+
+
 def build_dashboard(
     result: SimulationResult,
     start_money: int,
     goal: int,
     win_probability: float,
     output_file: Path,
+    timings: StageTimings | None = None,
 ) -> None:
-    figure = build_figure(
-        result=result,
-        start_money=start_money,
-        goal=goal,
-        win_probability=win_probability,
-    )
-    figure.write_html(str(output_file), include_plotlyjs="cdn", full_html=True)
+    html = build_dashboard_html(result, start_money, goal, win_probability, timings=timings)
+    with timed_stage(timings, "write_html"):
+        Path(output_file).write_text(html, encoding="utf-8")
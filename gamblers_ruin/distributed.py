@@ -0,0 +1,369 @@
+from __future__ import annotations
+
+import multiprocessing
+import socket
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from multiprocessing.managers import BaseManager
+from typing import Any
+
+import numpy as np
+
+from .batch import Scenario
+from .models import SimulationResult
+from .simulation import run_gamblers_ruin
+
+DEFAULT_PORT = 50555
+DEFAULT_SHARD_TRIALS = 10000
+DEFAULT_LEASE_TIMEOUT = 300.0
+DEFAULT_MAX_ATTEMPTS = 3
+
+
+@dataclass(frozen=True)
+class ShardTask:
+    cell: int
+    shard: int
+    start_money: int
+    goal: int
+    win_probability: float
+    trials: int
+    seed: int
+    max_steps_per_trial: int | None = None
+
+
+@dataclass(frozen=True)
+class ShardResult:
+    cell: int
+    shard: int
+    trials: int
+    success_bits: bytes
+    censored_bits: bytes
+    steps: bytes
+    worker: str
+
+
+def _pack(task: ShardTask, result: SimulationResult, worker: str) -> ShardResult:
+    # Outcomes travel as bit-packed flags and durations as uint32, about 4.25 bytes per trial.
+    return ShardResult(
+        cell=task.cell,
+        shard=task.shard,
+        trials=len(result.success),
+        success_bits=np.packbits(result.success).tobytes(),
+        censored_bits=np.packbits(result.censored).tobytes(),
+        steps=result.steps.astype(np.uint32).tobytes(),
+        worker=worker,
+    )
+
+
+def _unpack(shard: ShardResult) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    success = np.unpackbits(np.frombuffer(shard.success_bits, dtype=np.uint8), count=shard.trials).astype(bool)
+    censored = np.unpackbits(np.frombuffer(shard.censored_bits, dtype=np.uint8), count=shard.trials).astype(bool)
+    steps = np.frombuffer(shard.steps, dtype=np.uint32).astype(int)
+    return success, steps, censored
+
+
+def run_shard(task: ShardTask) -> SimulationResult:
+    # The shard's stream depends only on (seed, cell, shard), so results do not depend on
+    # which host ran it or in what order.
+    seed_sequence = np.random.SeedSequence(task.seed, spawn_key=(task.cell, task.shard))
+    return run_gamblers_ruin(
+        start_money=task.start_money,
+        goal=task.goal,
+        win_probability=task.win_probability,
+        trials=task.trials,
+        num_paths_to_capture=0,
+        max_steps_per_trial=task.max_steps_per_trial,
+        rng=np.random.default_rng(seed_sequence),
+    )
+
+
+class ShardDispatcher:
+    # Lives in the coordinator and is shared with workers through the manager. Every shard
+    # handed out carries a lease that its worker keeps renewing while it runs. An expired
+    # lease puts the shard back in line; a shard whose leases keep expiring without a single
+    # renewal fails the run instead of leaving the coordinator waiting.
+    def __init__(self, tasks: list[ShardTask], lease_timeout: float, max_attempts: int) -> None:
+        self._condition = threading.Condition()
+        self._tasks = {(task.cell, task.shard): task for task in tasks}
+        self._pending = deque(self._tasks)
+        self._leases: dict[tuple[int, int], float] = {}
+        self._renewed: set[tuple[int, int]] = set()
+        self._silent_expiries = dict.fromkeys(self._tasks, 0)
+        self._results: dict[tuple[int, int], ShardResult] = {}
+        self._lease_timeout = lease_timeout
+        self._max_attempts = max_attempts
+        self._failure: str | None = None
+
+    def heartbeat_interval(self) -> float:
+        return self._lease_timeout / 3
+
+    def lease(self, wait: float) -> ShardTask | None:
+        deadline = time.monotonic() + wait
+        with self._condition:
+            while not self.finished():
+                self._reclaim_expired()
+                if self._pending:
+                    key = self._pending.popleft()
+                    self._leases[key] = time.monotonic() + self._lease_timeout
+                    self._renewed.discard(key)
+                    return self._tasks[key]
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                self._condition.wait(min(remaining, 1.0))
+        return None
+
+    def renew(self, cell: int, shard: int) -> bool:
+        key = (cell, shard)
+        with self._condition:
+            if key not in self._leases:
+                return False
+            self._leases[key] = time.monotonic() + self._lease_timeout
+            self._renewed.add(key)
+            return True
+
+    def complete(self, result: ShardResult) -> None:
+        key = (result.cell, result.shard)
+        with self._condition:
+            # Seeds are deterministic, so when a reclaimed shard finishes twice the copies are
+            # identical and the first one wins.
+            if key not in self._tasks or key in self._results:
+                return
+            self._results[key] = result
+            self._leases.pop(key, None)
+            if key in self._pending:
+                self._pending.remove(key)
+            self._condition.notify_all()
+
+    def finished(self) -> bool:
+        with self._condition:
+            return self._failure is not None or len(self._results) == len(self._tasks)
+
+    def wait_for_results(self) -> dict[tuple[int, int], ShardResult]:
+        with self._condition:
+            while not self.finished():
+                self._reclaim_expired()
+                self._condition.wait(1.0)
+            if self._failure is not None:
+                raise RuntimeError(self._failure)
+            return dict(self._results)
+
+    def _reclaim_expired(self) -> None:
+        now = time.monotonic()
+        for key, expires in list(self._leases.items()):
+            if expires > now:
+                continue
+            del self._leases[key]
+            # A lease that was renewed at least once belonged to a live worker that later
+            # died, which says nothing about the shard itself, so only silent leases count.
+            if key not in self._renewed:
+                self._silent_expiries[key] += 1
+            if self._silent_expiries[key] >= self._max_attempts:
+                cell, shard = key
+                self._failure = (
+                    f"Shard {shard} of scenario {cell} lost {self._max_attempts} leases without "
+                    f"a single heartbeat within {self._lease_timeout:g}s; check that workers can reach "
+                    "the coordinator"
+                )
+                self._condition.notify_all()
+                return
+            self._pending.append(key)
+
+
+class _WorkerManager(BaseManager):
+    pass
+
+
+_WorkerManager.register("dispatcher")
+
+
+def _coordinator_manager(dispatcher: ShardDispatcher) -> type[BaseManager]:
+    # BaseManager keeps its registry on the class, so each run gets its own subclass rather
+    # than re-registering a different dispatcher on a shared one.
+    class CoordinatorManager(BaseManager):
+        pass
+
+    CoordinatorManager.register(
+        "dispatcher",
+        callable=lambda: dispatcher,
+        exposed=("lease", "renew", "complete", "finished", "heartbeat_interval"),
+    )
+    return CoordinatorManager
+
+
+def _serve(server: Any) -> None:
+    # Server.serve_forever can only be stopped by exiting the process, so the coordinator runs
+    # the accept loop itself and can close the listening socket when the run is over. The
+    # per-connection loops already watch server.stop_event, so it doubles as the stop flag.
+    stop = server.stop_event
+    while True:
+        try:
+            connection = server.listener.accept()
+        except OSError:
+            if stop.is_set():
+                return
+            continue
+        if stop.is_set():
+            connection.close()
+            return
+        threading.Thread(target=server.handle_request, args=(connection,), daemon=True).start()
+
+
+def _stop_server(server: Any, thread: threading.Thread) -> None:
+    server.stop_event.set()
+    host, port = server.address
+    # Wake the blocked accept() so the loop sees the stop flag.
+    try:
+        with socket.create_connection((host if host not in ("", "0.0.0.0") else "127.0.0.1", port), timeout=1.0):
+            pass
+    except OSError:
+        pass
+    thread.join(timeout=5.0)
+    server.listener.close()
+
+
+def _plan_shards(scenarios: list[Scenario], seed: int, shard_trials: int) -> list[ShardTask]:
+    tasks = []
+    for cell, scenario in enumerate(scenarios):
+        for shard, trials in enumerate(scenario.batch_sizes(shard_trials)):
+            tasks.append(
+                ShardTask(
+                    cell=cell,
+                    shard=shard,
+                    start_money=scenario.start_money,
+                    goal=scenario.goal,
+                    win_probability=scenario.win_probability,
+                    trials=trials,
+                    seed=scenario.seed if scenario.seed is not None else seed,
+                    max_steps_per_trial=scenario.max_steps_per_trial,
+                )
+            )
+    return tasks
+
+
+def merge_shards(shards: list[ShardResult]) -> SimulationResult:
+    ordered = sorted(shards, key=lambda shard: shard.shard)
+    parts = [_unpack(shard) for shard in ordered]
+    return SimulationResult(
+        success=np.concatenate([part[0] for part in parts]),
+        steps=np.concatenate([part[1] for part in parts]),
+        sample_paths=[],
+        censored=np.concatenate([part[2] for part in parts]),
+    )
+
+
+def run_coordinator(
+    scenarios: list[Scenario],
+    authkey: bytes,
+    host: str = "127.0.0.1",
+    port: int = DEFAULT_PORT,
+    seed: int = 0,
+    shard_trials: int = DEFAULT_SHARD_TRIALS,
+    local_workers: int = 0,
+    lease_timeout: float = DEFAULT_LEASE_TIMEOUT,
+    max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+) -> list[SimulationResult]:
+    tasks = _plan_shards(scenarios, seed, shard_trials)
+    dispatcher = ShardDispatcher(tasks, lease_timeout, max_attempts)
+
+    server = _coordinator_manager(dispatcher)(address=(host, port), authkey=authkey).get_server()
+    bound_port = server.address[1]
+    server.stop_event = threading.Event()
+    serving = threading.Thread(target=_serve, args=(server,), daemon=True)
+    serving.start()
+    print(f"Coordinator listening on {host}:{bound_port} with {len(tasks)} shards for {len(scenarios)} scenarios")
+
+    processes = []
+    try:
+        processes = spawn_local_workers(local_workers, authkey, host=host, port=bound_port)
+        received = dispatcher.wait_for_results()
+    finally:
+        # Workers see the dispatcher finish on their next poll and exit on their own; one still
+        # busy with a shard nobody needs any more is stopped.
+        for process in processes:
+            process.join(timeout=5.0)
+            if process.is_alive():
+                process.terminate()
+                process.join()
+        _stop_server(server, serving)
+
+    by_cell: dict[int, list[ShardResult]] = {cell: [] for cell in range(len(scenarios))}
+    for (cell, _), shard in received.items():
+        by_cell[cell].append(shard)
+    return [merge_shards(by_cell[cell]) for cell in range(len(scenarios))]
+
+
+def _heartbeat(dispatcher: Any, task: ShardTask, interval: float, stop: threading.Event) -> None:
+    while not stop.wait(interval):
+        try:
+            dispatcher.renew(task.cell, task.shard)
+        except (EOFError, ConnectionError):
+            return
+
+
+def run_worker(
+    authkey: bytes,
+    host: str = "127.0.0.1",
+    port: int = DEFAULT_PORT,
+    connect_timeout: float = 30.0,
+    poll_interval: float = 5.0,
+) -> int:
+    manager = _WorkerManager(address=(host, port), authkey=authkey)
+    deadline = time.monotonic() + connect_timeout
+    while True:
+        try:
+            manager.connect()
+            break
+        except ConnectionRefusedError:
+            if time.monotonic() >= deadline:
+                raise
+            time.sleep(0.5)
+
+    dispatcher: Any = manager.dispatcher()
+    worker = f"{socket.gethostname()}:{multiprocessing.current_process().pid}"
+    try:
+        interval = dispatcher.heartbeat_interval()
+    except (EOFError, ConnectionError):
+        return 0
+
+    # An empty queue does not mean the run is over: a shard held by a dead worker comes back
+    # once its lease expires, so workers keep polling until the dispatcher reports it is done.
+    completed = 0
+    while True:
+        try:
+            task = dispatcher.lease(poll_interval)
+            if task is None:
+                if dispatcher.finished():
+                    return completed
+                continue
+            # The lease is renewed from a side thread for as long as the shard runs, so a slow
+            # shard is never mistaken for a dead worker.
+            stop = threading.Event()
+            heartbeat = threading.Thread(target=_heartbeat, args=(dispatcher, task, interval, stop), daemon=True)
+            heartbeat.start()
+            try:
+                result = run_shard(task)
+            finally:
+                stop.set()
+                heartbeat.join()
+            dispatcher.complete(_pack(task, result, worker))
+        except (EOFError, ConnectionError):
+            # The coordinator has finished and shut down.
+            return completed
+        completed += 1
+
+
+def spawn_local_workers(
+    count: int,
+    authkey: bytes,
+    host: str = "127.0.0.1",
+    port: int = DEFAULT_PORT,
+) -> list[multiprocessing.Process]:
+    processes = [
+        multiprocessing.Process(target=run_worker, args=(authkey, host, port), daemon=True) for _ in range(count)
+    ]
+    for process in processes:
+        process.start()
+    return processes
@@ -0,0 +1,206 @@
+from __future__ import annotations
+
+import math
+from collections.abc import Callable
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from .analytics import theoretical_goal_probability
+from .models import SimulationResult
+from .simulation import run_gamblers_ruin
+from .strategies import UnitStake, run_strategy
+
+Engine = Callable[[int, int, float, int, np.random.Generator], SimulationResult]
+
+DEFAULT_GRID: tuple[tuple[int, int, float], ...] = (
+    (5, 10, 0.5),
+    (3, 10, 0.45),
+    (10, 20, 0.55),
+    (1, 4, 0.3),
+    (7, 15, 0.49),
+)
+
+
+def reference_engine(
+    start_money: int,
+    goal: int,
+    win_probability: float,
+    trials: int,
+    rng: np.random.Generator,
+) -> SimulationResult:
+    return run_gamblers_ruin(
+        start_money=start_money,
+        goal=goal,
+        win_probability=win_probability,
+        trials=trials,
+        num_paths_to_capture=0,
+        rng=rng,
+    )
+
+
+def vectorized_unit_engine(
+    start_money: int,
+    goal: int,
+    win_probability: float,
+    trials: int,
+    rng: np.random.Generator,
+) -> SimulationResult:
+    return run_strategy(
+        UnitStake(),
+        start_money=start_money,
+        goal=goal,
+        win_probability=win_probability,
+        trials=trials,
+        num_paths_to_capture=0,
+        rng=rng,
+    )
+
+
+def exact_duration_moments(start_money: int, goal: int, win_probability: float) -> tuple[float, float]:
+    # First-step analysis on the interior states 1..goal-1:
+    #   m1(k) = 1 + p m1(k+1) + q m1(k-1)
+    #   m2(k) = 2 m1(k) - 1 + p m2(k+1) + q m2(k-1)
+    # with both moments zero at the absorbing states.
+    if start_money <= 0 or goal <= start_money:
+        raise ValueError("Require 0 < start_money < goal")
+    size = goal - 1
+    system = np.eye(size)
+    system[np.arange(size - 1), np.arange(1, size)] = -win_probability
+    system[np.arange(1, size), np.arange(size - 1)] = -(1.0 - win_probability)
+    first = np.linalg.solve(system, np.ones(size))
+    second = np.linalg.solve(system, 2.0 * first - 1.0)
+    mean = first[start_money - 1]
+    return float(mean), float(second[start_money - 1] - mean**2)
+
+
+def _normal_two_sided_p_value(z: float) -> float:
+    return math.erfc(abs(z) / math.sqrt(2.0))
+
+
+def binomial_p_value(successes: int, trials: int, probability: float) -> float:
+    if probability in (0.0, 1.0):
+        return 1.0 if successes == probability * trials else 0.0
+    z = (successes - trials * probability) / math.sqrt(trials * probability * (1.0 - probability))
+    return _normal_two_sided_p_value(z)
+
+
+def two_proportion_p_value(successes_a: int, trials_a: int, successes_b: int, trials_b: int) -> float:
+    pooled = (successes_a + successes_b) / (trials_a + trials_b)
+    if pooled in (0.0, 1.0):
+        return 1.0
+    spread = math.sqrt(pooled * (1.0 - pooled) * (1.0 / trials_a + 1.0 / trials_b))
+    return _normal_two_sided_p_value((successes_a / trials_a - successes_b / trials_b) / spread)
+
+
+def mean_p_value(samples: np.ndarray, mean: float, variance: float) -> float:
+    if variance == 0.0:
+        return 1.0 if np.all(samples == mean) else 0.0
+    z = (samples.mean() - mean) / math.sqrt(variance / len(samples))
+    return _normal_two_sided_p_value(z)
+
+
+def ks_two_sample(sample_a: np.ndarray, sample_b: np.ndarray) -> tuple[float, float]:
+    # Asymptotic Kolmogorov p-value. Durations are discrete, which only makes the test
+    # conservative, so it never raises the false-failure rate above alpha.
+    sample_a = np.sort(sample_a)
+    sample_b = np.sort(sample_b)
+    support = np.concatenate([sample_a, sample_b])
+    cdf_a = np.searchsorted(sample_a, support, side="right") / len(sample_a)
+    cdf_b = np.searchsorted(sample_b, support, side="right") / len(sample_b)
+    statistic = float(np.max(np.abs(cdf_a - cdf_b)))
+
+    effective = math.sqrt(len(sample_a) * len(sample_b) / (len(sample_a) + len(sample_b)))
+    scaled = (effective + 0.12 + 0.11 / effective) * statistic
+    if scaled < 1e-3:
+        return statistic, 1.0
+    p_value = 2.0 * sum((-1) ** (k - 1) * math.exp(-2.0 * k * k * scaled * scaled) for k in range(1, 101))
+    return statistic, min(max(p_value, 0.0), 1.0)
+
+
+@dataclass
+class CheckResult:
+    engine: str
+    start_money: int
+    goal: int
+    win_probability: float
+    check: str
+    p_value: float
+    passed: bool
+
+
+@dataclass
+class EquivalenceReport:
+    alpha: float
+    per_check_alpha: float
+    checks: list[CheckResult] = field(default_factory=list)
+
+    @property
+    def passed(self) -> bool:
+        return all(check.passed for check in self.checks)
+
+    def failures(self) -> list[CheckResult]:
+        return [check for check in self.checks if not check.passed]
+
+    def format(self) -> str:
+        lines = [
+            f"{len(self.checks)} checks, family-wise alpha={self.alpha:g} "
+            f"(Bonferroni per-check alpha={self.per_check_alpha:.2e})"
+        ]
+        for check in self.checks:
+            status = "ok  " if check.passed else "FAIL"
+            lines.append(
+                f"  {status} {check.engine:<12} start={check.start_money:<3} goal={check.goal:<3} "
+                f"p={check.win_probability:<5g} {check.check:<28} p-value={check.p_value:.4f}"
+            )
+        return "\n".join(lines)
+
+
+def run_equivalence_suite(
+    candidates: dict[str, Engine],
+    grid: tuple[tuple[int, int, float], ...] = DEFAULT_GRID,
+    trials: int = 20000,
+    alpha: float = 0.001,
+    seed: int | None = 0,
+    reference: Engine = reference_engine,
+) -> EquivalenceReport:
+    # Each candidate runs 4 checks per cell and the reference 2; Bonferroni keeps the chance
+    # of any false failure across the whole suite below alpha.
+    check_count = len(grid) * (2 + 4 * len(candidates))
+    report = EquivalenceReport(alpha=alpha, per_check_alpha=alpha / check_count)
+    seeds = iter(np.random.SeedSequence(seed).spawn(len(grid) * (1 + len(candidates))))
+
+    def record(engine: str, cell: tuple[int, int, float], check: str, p_value: float) -> None:
+        start_money, goal, win_probability = cell
+        report.checks.append(
+            CheckResult(
+                engine=engine,
+                start_money=start_money,
+                goal=goal,
+                win_probability=win_probability,
+                check=check,
+                p_value=p_value,
+                passed=p_value >= report.per_check_alpha,
+            )
+        )
+
+    def check_against_theory(name: str, cell: tuple[int, int, float], result: SimulationResult) -> None:
+        probability = theoretical_goal_probability(*cell)
+        mean, variance = exact_duration_moments(*cell)
+        record(name, cell, "P(goal) vs closed form", binomial_p_value(int(result.success.sum()), trials, probability))
+        record(name, cell, "mean duration vs exact", mean_p_value(result.steps, mean, variance))
+
+    for cell in grid:
+        baseline = reference(*cell, trials, np.random.default_rng(next(seeds)))
+        check_against_theory("reference", cell, baseline)
+        for name, engine in candidates.items():
+            result = engine(*cell, trials, np.random.default_rng(next(seeds)))
+            check_against_theory(name, cell, result)
+            record(
+                name,
+                cell,
+                "P(goal) vs reference",
+                two_proportion_p_value(int(result.success.sum()), trials, int(baseline.success.sum()), trials),
+            )
+            record(name, cell, "duration KS vs reference", ks_two_sample(result.steps, baseline.steps)[1])
+    return report
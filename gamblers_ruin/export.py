@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+import csv
+from pathlib import Path
+from typing import Protocol
+
+import numpy as np
+
+from .simulation import TrialSink
+
+TRIAL_DTYPE = np.dtype([("success", "?"), ("steps", "<i8"), ("censored", "?")])
+PATH_DTYPE = np.dtype([("path", "<i4"), ("step", "<i8"), ("money", "<i8")])
+EXPORT_SUFFIXES = (".csv", ".npy", ".arrow")
+
+
+def paths_file_for(output_file: Path) -> Path:
+    output_file = Path(output_file)
+    return output_file.with_name(f"{output_file.stem}_paths{output_file.suffix}")
+
+
+def _trial_records(success: np.ndarray, steps: np.ndarray, censored: np.ndarray) -> np.ndarray:
+    records = np.empty(len(success), dtype=TRIAL_DTYPE)
+    records["success"] = success
+    records["steps"] = steps
+    records["censored"] = censored
+    return records
+
+
+def _path_records(index: int, path: np.ndarray) -> np.ndarray:
+    records = np.empty(len(path), dtype=PATH_DTYPE)
+    records["path"] = index
+    records["step"] = np.arange(len(path))
+    records["money"] = path
+    return records
+
+
+class _NpyStreamWriter:
+    # Fixed header size so the final row count can be patched in place after streaming.
+    HEADER_SIZE = 256
+
+    def __init__(self, path: Path, dtype: np.dtype) -> None:
+        self.dtype = dtype
+        self.count = 0
+        self._file = open(path, "wb")
+        self._file.write(self._header(0))
+
+    def _header(self, count: int) -> bytes:
+        header = {"descr": np.lib.format.dtype_to_descr(self.dtype), "fortran_order": False, "shape": (count,)}
+        text = repr(header).encode("latin1")
+        prefix = b"\x93NUMPY\x01\x00"
+        padding = self.HEADER_SIZE - len(prefix) - 2 - len(text) - 1
+        if padding < 0:
+            raise ValueError("dtype description is too long for the streaming .npy header")
+        body = text + b" " * padding + b"\n"
+        return prefix + len(body).to_bytes(2, "little") + body
+
+    def append(self, records: np.ndarray) -> None:
+        records.tofile(self._file)
+        self.count += len(records)
+
+    def close(self) -> None:
+        self._file.seek(0)
+        self._file.write(self._header(self.count))
+        self._file.close()
+
+
+class TrialExporter(TrialSink, Protocol):
+    output_file: Path
+    paths_file: Path
+    trials_written: int
+    paths_written: int
+
+    def close(self) -> None: ...
+
+    def __enter__(self) -> TrialExporter:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+
+class CsvTrialExporter(TrialExporter):
+    def __init__(self, output_file: Path) -> None:
+        self.output_file = Path(output_file)
+        self.paths_file = paths_file_for(self.output_file)
+        self.trials_written = 0
+        self.paths_written = 0
+        self._trials_handle = self.output_file.open("w", newline="")
+        self._trials = csv.writer(self._trials_handle)
+        self._trials.writerow(["trial", "success", "steps", "censored"])
+        self._paths_handle = None
+        self._paths = None
+
+    def write_trials(self, success: np.ndarray, steps: np.ndarray, censored: np.ndarray) -> None:
+        first = self.trials_written
+        self._trials.writerows(
+            zip(
+                range(first, first + len(success)),
+                success.astype(int).tolist(),
+                steps.tolist(),
+                censored.astype(int).tolist(),
+            )
+        )
+        self.trials_written += len(success)
+
+    def write_path(self, index: int, path: np.ndarray) -> None:
+        if self._paths is None:
+            self._paths_handle = self.paths_file.open("w", newline="")
+            self._paths = csv.writer(self._paths_handle)
+            self._paths.writerow(["path", "step", "money"])
+        self._paths.writerows((index, step, money) for step, money in enumerate(path.tolist()))
+        self.paths_written += 1
+
+    def close(self) -> None:
+        self._trials_handle.close()
+        if self._paths_handle is not None:
+            self._paths_handle.close()
+
+
+class NpyTrialExporter(TrialExporter):
+    def __init__(self, output_file: Path) -> None:
+        self.output_file = Path(output_file)
+        self.paths_file = paths_file_for(self.output_file)
+        self.trials_written = 0
+        self.paths_written = 0
+        self._trials = _NpyStreamWriter(self.output_file, TRIAL_DTYPE)
+        self._paths: _NpyStreamWriter | None = None
+
+    def write_trials(self, success: np.ndarray, steps: np.ndarray, censored: np.ndarray) -> None:
+        self._trials.append(_trial_records(success, steps, censored))
+        self.trials_written += len(success)
+
+    def write_path(self, index: int, path: np.ndarray) -> None:
+        if self._paths is None:
+            self._paths = _NpyStreamWriter(self.paths_file, PATH_DTYPE)
+        self._paths.append(_path_records(index, path))
+        self.paths_written += 1
+
+    def close(self) -> None:
+        self._trials.close()
+        if self._paths is not None:
+            self._paths.close()
+
+
+class ArrowTrialExporter(TrialExporter):
+    def __init__(self, output_file: Path) -> None:
+        self.output_file = Path(output_file)
+        self.paths_file = paths_file_for(self.output_file)
+        self.trials_written = 0
+        self.paths_written = 0
+        try:
+            import pyarrow as pa
+            import pyarrow.ipc as ipc
+        except ImportError as exc:
+            raise SystemExit("Missing dependency: pyarrow. Install it with: pip install pyarrow") from exc
+
+        self._pa = pa
+        self._ipc = ipc
+        self._trial_schema = pa.schema(
+            [("success", pa.bool_()), ("steps", pa.int64()), ("censored", pa.bool_())]
+        )
+        self._path_schema = pa.schema([("path", pa.int32()), ("step", pa.int64()), ("money", pa.int64())])
+        self._trials = ipc.new_file(str(self.output_file), self._trial_schema)
+        self._paths = None
+
+    def write_trials(self, success: np.ndarray, steps: np.ndarray, censored: np.ndarray) -> None:
+        batch = self._pa.record_batch(
+            [self._pa.array(success), self._pa.array(steps, type=self._pa.int64()), self._pa.array(censored)],
+            schema=self._trial_schema,
+        )
+        self._trials.write_batch(batch)
+        self.trials_written += len(success)
+
+    def write_path(self, index: int, path: np.ndarray) -> None:
+        if self._paths is None:
+            self._paths = self._ipc.new_file(str(self.paths_file), self._path_schema)
+        records = _path_records(index, path)
+        batch = self._pa.record_batch(
+            [self._pa.array(records[name]) for name in PATH_DTYPE.names],
+            schema=self._path_schema,
+        )
+        self._paths.write_batch(batch)
+        self.paths_written += 1
+
+    def close(self) -> None:
+        self._trials.close()
+        if self._paths is not None:
+            self._paths.close()
+
+
+def open_exporter(output_file: Path) -> TrialExporter:
+    suffix = Path(output_file).suffix.lower()
+    if suffix == ".csv":
+        return CsvTrialExporter(output_file)
+    if suffix == ".npy":
+        return NpyTrialExporter(output_file)
+    if suffix == ".arrow":
+        return ArrowTrialExporter(output_file)
+    raise ValueError(f"Unsupported export format {suffix!r}; use one of {', '.join(EXPORT_SUFFIXES)}")
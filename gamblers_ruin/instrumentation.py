@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager, nullcontext
+from typing import ContextManager, Protocol
+
+from .models import SimulationResult
+
+
+class MetricsStore(Protocol):
+    def add_metrics(self, deltas: dict[str, float]) -> None: ...
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._flushed: dict[str, float] = {}
+        self.stage_seconds: dict[str, float] = {}
+        self.stage_calls: dict[str, int] = {}
+        self.counters: dict[str, float] = {
+            "simulated_trials": 0,
+            "simulated_steps": 0,
+            "simulation_seconds": 0.0,
+            "cache_hits": 0,
+            "cache_misses": 0,
+        }
+
+    def observe_stage(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self.stage_seconds[name] = self.stage_seconds.get(name, 0.0) + seconds
+            self.stage_calls[name] = self.stage_calls.get(name, 0) + 1
+
+    def increment(self, name: str, amount: float = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def record_simulation(self, result: SimulationResult, seconds: float) -> None:
+        with self._lock:
+            self.counters["simulated_trials"] += len(result.success)
+            self.counters["simulated_steps"] += int(result.steps.sum())
+            self.counters["simulation_seconds"] += seconds
+
+    def snapshot(self) -> dict[str, float]:
+        # Flat "kind:name" keys so totals can be summed across processes in a plain table.
+        with self._lock:
+            values = {f"counter:{name}": value for name, value in self.counters.items()}
+            values.update({f"stage_seconds:{name}": value for name, value in self.stage_seconds.items()})
+            values.update({f"stage_calls:{name}": value for name, value in self.stage_calls.items()})
+        return values
+
+    def flush_to(self, store: MetricsStore) -> None:
+        # Adds what this process recorded since its last flush to the shared totals.
+        with self._flush_lock:
+            current = self.snapshot()
+            deltas = {
+                name: value - self._flushed.get(name, 0)
+                for name, value in current.items()
+                if value != self._flushed.get(name, 0)
+            }
+            if deltas:
+                store.add_metrics(deltas)
+            self._flushed = current
+
+    def render_prometheus(self, totals: dict[str, float] | None = None) -> str:
+        values = self.snapshot() if totals is None else totals
+        counters: dict[str, float] = dict.fromkeys(
+            ("simulated_trials", "simulated_steps", "simulation_seconds", "cache_hits", "cache_misses"), 0
+        )
+        stage_seconds: dict[str, float] = {}
+        stage_calls: dict[str, float] = {}
+        sections = {"counter": counters, "stage_seconds": stage_seconds, "stage_calls": stage_calls}
+        for key, value in values.items():
+            kind, _, name = key.partition(":")
+            if kind in sections:
+                sections[kind][name] = value
+
+        lines = [
+            "# HELP gamblers_ruin_stage_seconds_total Wall time spent in each dashboard stage.",
+            "# TYPE gamblers_ruin_stage_seconds_total counter",
+        ]
+        lines += [f'gamblers_ruin_stage_seconds_total{{stage="{name}"}} {value:.6f}' for name, value in stage_seconds.items()]
+        lines += [
+            "# HELP gamblers_ruin_stage_calls_total Number of times each dashboard stage ran.",
+            "# TYPE gamblers_ruin_stage_calls_total counter",
+        ]
+        lines += [f'gamblers_ruin_stage_calls_total{{stage="{name}"}} {int(value)}' for name, value in stage_calls.items()]
+
+        for name in ("simulated_trials", "simulated_steps", "cache_hits", "cache_misses"):
+            lines += [
+                f"# TYPE gamblers_ruin_{name}_total counter",
+                f"gamblers_ruin_{name}_total {int(counters[name])}",
+            ]
+
+        seconds = counters["simulation_seconds"]
+        lookups = counters["cache_hits"] + counters["cache_misses"]
+        gauges = {
+            "trials_per_second": counters["simulated_trials"] / seconds if seconds else 0.0,
+            "steps_per_second": counters["simulated_steps"] / seconds if seconds else 0.0,
+            "cache_hit_ratio": counters["cache_hits"] / lookups if lookups else 0.0,
+        }
+        for name, value in gauges.items():
+            lines += [f"# TYPE gamblers_ruin_{name} gauge", f"gamblers_ruin_{name} {value:.6f}"]
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+
+class StageTimings:
+    def __init__(self, registry: MetricsRegistry | None = REGISTRY) -> None:
+        self.registry = registry
+        self.durations: dict[str, float] = {}
+        self._child_seconds: list[float] = []
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        # Nested stages are reported as exclusive time so the breakdown sums to the wall time.
+        self._child_seconds.append(0.0)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            exclusive = elapsed - self._child_seconds.pop()
+            if self._child_seconds:
+                self._child_seconds[-1] += elapsed
+            self.durations[name] = self.durations.get(name, 0.0) + exclusive
+            if self.registry is not None:
+                self.registry.observe_stage(name, exclusive)
+
+    def total(self) -> float:
+        return sum(self.durations.values())
+
+    def server_timing_header(self) -> str:
+        return ", ".join(f"{name};dur={seconds * 1000.0:.1f}" for name, seconds in self.durations.items())
+
+    def breakdown(self) -> str:
+        total = self.total()
+        width = max([len("total"), *(len(name) for name in self.durations)])
+        lines = []
+        for name, seconds in self.durations.items():
+            share = seconds / total if total else 0.0
+            lines.append(f"  {name:<{width}}  {seconds:9.4f}s  {share:6.1%}")
+        lines.append(f"  {'total':<{width}}  {total:9.4f}s")
+        return "\n".join(lines)
+
+
+def timed_stage(timings: StageTimings | None, name: str) -> ContextManager[None]:
+    if timings is None:
+        return nullcontext()
+    return timings.stage(name)
@@ -10,3 +10,4 @@ class SimulationResult:
     success: np.ndarray
     steps: np.ndarray
     sample_paths: list[np.ndarray]
+    censored: np.ndarray
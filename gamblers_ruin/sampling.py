@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import heapq
+from typing import Protocol
+
+import numpy as np
+
+PATH_SAMPLING_METHODS = ("first", "reservoir", "longest", "stratified")
+
+
+class PathSelector(Protocol):
+    # Final selectors never evict a kept path, so kept paths can be streamed straight away.
+    decisions_are_final: bool
+    capacity: int
+
+    def should_record(self, trial: int) -> bool: ...
+
+    def offer(self, trial: int, trajectory: list[int], success: bool, censored: bool) -> bool: ...
+
+    def selected(self) -> list[tuple[int, np.ndarray]]: ...
+
+
+def _check_capacity(capacity: int) -> int:
+    if capacity < 0:
+        raise ValueError("capacity cannot be negative")
+    return capacity
+
+
+class FirstPathSelector:
+    decisions_are_final = True
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = _check_capacity(capacity)
+        self._paths: list[tuple[int, np.ndarray]] = []
+
+    def should_record(self, trial: int) -> bool:
+        return len(self._paths) < self.capacity
+
+    def offer(self, trial: int, trajectory: list[int], success: bool, censored: bool) -> bool:
+        self._paths.append((trial, np.array(trajectory)))
+        return True
+
+    def selected(self) -> list[tuple[int, np.ndarray]]:
+        return list(self._paths)
+
+
+class _Reservoir:
+    def __init__(self, capacity: int, rng: np.random.Generator) -> None:
+        self.capacity = capacity
+        self.rng = rng
+        self.seen = 0
+        self.items: list[tuple[int, np.ndarray]] = []
+
+    def next_slot(self) -> int | None:
+        # Algorithm R: the n-th item replaces a random slot with probability capacity / n.
+        self.seen += 1
+        if self.seen <= self.capacity:
+            return self.seen - 1
+        slot = int(self.rng.integers(0, self.seen))
+        return slot if slot < self.capacity else None
+
+    def put(self, slot: int, trial: int, trajectory: list[int]) -> None:
+        item = (trial, np.array(trajectory))
+        if slot == len(self.items):
+            self.items.append(item)
+        else:
+            self.items[slot] = item
+
+    def sample(self, count: int) -> list[tuple[int, np.ndarray]]:
+        if count >= len(self.items):
+            return list(self.items)
+        return [self.items[index] for index in self.rng.choice(len(self.items), size=count, replace=False)]
+
+
+class ReservoirPathSelector:
+    decisions_are_final = False
+
+    def __init__(self, capacity: int, rng: np.random.Generator | None = None) -> None:
+        self.capacity = _check_capacity(capacity)
+        self._reservoir = _Reservoir(capacity, rng or np.random.default_rng())
+        self._pending_slot: int | None = None
+
+    def should_record(self, trial: int) -> bool:
+        # The slot is drawn before the walk so trajectories that will be discarded are never recorded.
+        self._pending_slot = self._reservoir.next_slot() if self.capacity > 0 else None
+        return self._pending_slot is not None
+
+    def offer(self, trial: int, trajectory: list[int], success: bool, censored: bool) -> bool:
+        if self._pending_slot is None:
+            return False
+        self._reservoir.put(self._pending_slot, trial, trajectory)
+        self._pending_slot = None
+        return True
+
+    def selected(self) -> list[tuple[int, np.ndarray]]:
+        return sorted(self._reservoir.items, key=lambda item: item[0])
+
+
+class LongestPathSelector:
+    decisions_are_final = False
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = _check_capacity(capacity)
+        self._heap: list[tuple[int, int, np.ndarray]] = []
+
+    def should_record(self, trial: int) -> bool:
+        return self.capacity > 0
+
+    def offer(self, trial: int, trajectory: list[int], success: bool, censored: bool) -> bool:
+        # Ties keep the earlier trial, hence the negated trial index in the heap key.
+        key = (len(trajectory), -trial)
+        if len(self._heap) < self.capacity:
+            heapq.heappush(self._heap, (*key, np.array(trajectory)))
+            return True
+        if key <= self._heap[0][:2]:
+            return False
+        heapq.heapreplace(self._heap, (*key, np.array(trajectory)))
+        return True
+
+    def selected(self) -> list[tuple[int, np.ndarray]]:
+        ordered = sorted(self._heap, key=lambda item: (item[0], item[1]), reverse=True)
+        return [(-negated_trial, path) for _, negated_trial, path in ordered]
+
+
+class StratifiedPathSelector:
+    decisions_are_final = False
+
+    def __init__(self, capacity: int, rng: np.random.Generator | None = None) -> None:
+        self.capacity = _check_capacity(capacity)
+        rng = rng or np.random.default_rng()
+        # Both strata keep a full-size reservoir so that slots one stratum cannot fill, for
+        # example ruins when nearly every walk reaches the goal, go to the other one.
+        self._successes = _Reservoir(capacity, rng)
+        self._ruins = _Reservoir(capacity, rng)
+
+    def should_record(self, trial: int) -> bool:
+        return self.capacity > 0
+
+    def offer(self, trial: int, trajectory: list[int], success: bool, censored: bool) -> bool:
+        if censored:
+            return False
+        reservoir = self._successes if success else self._ruins
+        slot = reservoir.next_slot()
+        if slot is None:
+            return False
+        reservoir.put(slot, trial, trajectory)
+        return True
+
+    def selected(self) -> list[tuple[int, np.ndarray]]:
+        kept_successes = len(self._successes.items)
+        kept_ruins = len(self._ruins.items)
+        success_share = min(kept_successes, max(self.capacity - self.capacity // 2, self.capacity - kept_ruins))
+        ruin_share = min(kept_ruins, self.capacity - success_share)
+        chosen = self._successes.sample(success_share) + self._ruins.sample(ruin_share)
+        return sorted(chosen, key=lambda item: item[0])
+
+
+def make_path_selector(method: str, capacity: int, rng: np.random.Generator | None = None) -> PathSelector:
+    if method == "first":
+        return FirstPathSelector(capacity)
+    if method == "reservoir":
+        return ReservoirPathSelector(capacity, rng)
+    if method == "longest":
+        return LongestPathSelector(capacity)
+    if method == "stratified":
+        return StratifiedPathSelector(capacity, rng)
+    raise ValueError(f"Unknown path sampling method {method!r}; use one of {', '.join(PATH_SAMPLING_METHODS)}")
@@ -1,8 +1,54 @@
 from __future__ import annotations
 
+import threading
+import time
+from collections.abc import Callable, Iterator
+from typing import Protocol
+
 import numpy as np
 
 from .models import SimulationResult
+from .sampling import FirstPathSelector, PathSelector
+
+TRIAL_BATCH_SIZE = 256
+CANCEL_CHECK_STEPS = 1 << 18
+UNIFORM_BLOCK_SIZE = 4096
+
+
+class SimulationCancelled(Exception):
+    pass
+
+
+class CancellationToken:
+    def __init__(self, deadline: float | None = None) -> None:
+        self.deadline = deadline
+        self._event = threading.Event()
+
+    def cancel(self) -> None:
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        if self._event.is_set():
+            return True
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    def raise_if_cancelled(self) -> None:
+        if self.cancelled:
+            raise SimulationCancelled("Simulation was cancelled")
+
+
+class TrialSink(Protocol):
+    def write_trials(self, success: np.ndarray, steps: np.ndarray, censored: np.ndarray) -> None: ...
+
+    def write_path(self, index: int, path: np.ndarray) -> None: ...
+
+
+def _uniforms(random: Callable[[int], np.ndarray]) -> Iterator[float]:
+    # One scalar Generator.random() call per step costs more than the rest of the step, so
+    # uniforms are drawn a block at a time and handed out as plain floats.
+    while True:
+        yield from random(UNIFORM_BLOCK_SIZE).tolist()
 
 
 def run_gamblers_ruin(
@@ -11,26 +57,93 @@ def run_gamblers_ruin(
     win_probability: float,
     trials: int,
     num_paths_to_capture: int,
+    cancel_token: CancellationToken | None = None,
+    max_steps_per_trial: int | None = None,
+    total_step_budget: int | None = None,
+    rng: np.random.Generator | None = None,
+    sink: TrialSink | None = None,
+    path_selector: PathSelector | None = None,
 ) -> SimulationResult:
     success = np.zeros(trials, dtype=bool)
     steps = np.zeros(trials, dtype=int)
-    sample_paths: list[np.ndarray] = []
+    censored = np.zeros(trials, dtype=bool)
+    selector = path_selector if path_selector is not None else FirstPathSelector(num_paths_to_capture)
+    remaining_budget = total_step_budget
+    draw = _uniforms(np.random.random if rng is None else rng.random).__next__
+    completed = trials
+    flushed = 0
+    # Steps left before the next cancellation check. The count runs across walks, so short
+    # walks near p = 0.5 are covered as well as a single walk that runs for minutes; -1
+    # disables the check like step_limit.
+    check_in = CANCEL_CHECK_STEPS if cancel_token is not None else -1
 
     for trial in range(trials):
+        if trial % TRIAL_BATCH_SIZE == 0:
+            if cancel_token is not None:
+                cancel_token.raise_if_cancelled()
+            if sink is not None and trial > flushed:
+                sink.write_trials(success[flushed:trial], steps[flushed:trial], censored[flushed:trial])
+                flushed = trial
+
+        step_limit = max_steps_per_trial
+        if remaining_budget is not None:
+            step_limit = remaining_budget if step_limit is None else min(step_limit, remaining_budget)
+        # -1 never equals the step count, so uncapped trials skip the limit check for free.
+        step_limit = -1 if step_limit is None else step_limit
+
         money = start_money
+        record = selector.should_record(trial)
         trajectory = [money]
         count = 0
+        next_check = check_in
 
-        while 0 < money < goal:
-            money += 1 if np.random.random() < win_probability else -1
+        while 0 < money < goal and count != step_limit:
+            money += 1 if draw() < win_probability else -1
             count += 1
-            if trial < num_paths_to_capture:
+            if record:
                 trajectory.append(money)
+            if count == next_check:
+                cancel_token.raise_if_cancelled()
+                next_check += CANCEL_CHECK_STEPS
+
+        if cancel_token is not None:
+            check_in = next_check - count
 
         success[trial] = money == goal
         steps[trial] = count
+        censored[trial] = 0 < money < goal
+
+        if record:
+            kept = selector.offer(trial, trajectory, bool(success[trial]), bool(censored[trial]))
+            if kept and sink is not None and selector.decisions_are_final:
+                sink.write_path(trial, np.asarray(trajectory))
+
+        if remaining_budget is not None:
+            remaining_budget -= count
+            if remaining_budget <= 0:
+                completed = trial + 1
+                break
+
+    selected = selector.selected()
+    if sink is not None:
+        if completed > flushed:
+            sink.write_trials(success[flushed:completed], steps[flushed:completed], censored[flushed:completed])
+        if not selector.decisions_are_final:
+            for trial, path in selected:
+                sink.write_path(trial, path)
+
+    return SimulationResult(
+        success=success[:completed],
+        steps=steps[:completed],
+        sample_paths=[path for _, path in selected],
+        censored=censored[:completed],
+    )
 
-        if trial < num_paths_to_capture:
-            sample_paths.append(np.array(trajectory))
 
-    return SimulationResult(success=success, steps=steps, sample_paths=sample_paths)
+def merge_results(results: list[SimulationResult]) -> SimulationResult:
+    return SimulationResult(
+        success=np.concatenate([result.success for result in results]),
+        steps=np.concatenate([result.steps for result in results]),
+        sample_paths=[path for result in results for path in result.sample_paths],
+        censored=np.concatenate([result.censored for result in results]),
+    )
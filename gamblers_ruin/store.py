@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import io
+import os
+import sqlite3
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+
+from .models import SimulationResult
+
+
+def _user_cache_dir() -> Path:
+    if os.name == "nt":
+        return Path(os.environ.get("LOCALAPPDATA") or Path.home() / "AppData" / "Local")
+    return Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache")
+
+
+# Under the user's own cache directory rather than the shared temp directory, where another
+# local user could create or fill the file first.
+DEFAULT_STORE_PATH = _user_cache_dir() / "gamblers_ruin" / "results.sqlite3"
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_TTL_SECONDS = 3600.0
+
+
+def result_key(
+    start_money: int,
+    goal: int,
+    win_probability: float,
+    trials: int,
+    num_paths_to_capture: int,
+    max_steps_per_trial: int | None = None,
+    total_step_budget: int | None = None,
+    path_sampling: str = "first",
+) -> str:
+    return (
+        f"start={start_money};goal={goal};p={win_probability!r};trials={trials};paths={num_paths_to_capture};"
+        f"max_steps={max_steps_per_trial};step_budget={total_step_budget};path_sampling={path_sampling}"
+    )
+
+
+def encode_result(result: SimulationResult) -> bytes:
+    path_lengths = np.array([len(path) for path in result.sample_paths], dtype=np.int64)
+    path_values = (
+        np.concatenate(result.sample_paths) if result.sample_paths else np.zeros(0, dtype=np.int64)
+    )
+    buffer = io.BytesIO()
+    np.savez(
+        buffer,
+        success=result.success,
+        steps=result.steps,
+        censored=result.censored,
+        path_lengths=path_lengths,
+        path_values=path_values,
+    )
+    return buffer.getvalue()
+
+
+def decode_result(payload: bytes) -> SimulationResult:
+    with np.load(io.BytesIO(payload)) as data:
+        success = data["success"]
+        steps = data["steps"]
+        censored = data["censored"] if "censored" in data.files else np.zeros(len(success), dtype=bool)
+        path_lengths = data["path_lengths"]
+        path_values = data["path_values"]
+    boundaries = np.cumsum(path_lengths)[:-1]
+    sample_paths = list(np.split(path_values, boundaries)) if len(path_lengths) else []
+    return SimulationResult(success=success, steps=steps, sample_paths=sample_paths, censored=censored)
+
+
+class ResultStore:
+    def __init__(
+        self,
+        path: Path = DEFAULT_STORE_PATH,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        ttl_seconds: float | None = DEFAULT_TTL_SECONDS,
+    ) -> None:
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._create_private_file()
+        with self._connect() as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            columns = {row[1] for row in connection.execute("PRAGMA table_info(results)")}
+            if columns and "accessed" not in columns:
+                # Stores written before eviction existed are only a cache; start them over.
+                connection.execute("DROP TABLE results")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "key TEXT PRIMARY KEY, payload BLOB NOT NULL, size INTEGER NOT NULL, "
+                "created REAL NOT NULL, accessed REAL NOT NULL)"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed)")
+            connection.execute("CREATE TABLE IF NOT EXISTS metrics (name TEXT PRIMARY KEY, value REAL NOT NULL)")
+
+    def _create_private_file(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True, mode=0o700)
+        try:
+            # O_EXCL so a file someone else planted is never silently adopted; SQLite gives the
+            # -wal and -shm files the same 0600 permissions.
+            os.close(os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o600))
+        except FileExistsError:
+            if hasattr(os, "getuid") and self.path.stat().st_uid != os.getuid():
+                raise PermissionError(f"Result store {self.path} belongs to another user") from None
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # One short-lived connection per call keeps the store safe across forked workers and threads.
+        connection = sqlite3.connect(self.path, timeout=30.0)
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    def _oldest_valid(self, now: float) -> float:
+        return now - self.ttl_seconds if self.ttl_seconds is not None else float("-inf")
+
+    def get(self, key: str) -> SimulationResult | None:
+        now = time.time()
+        with self._connect() as connection:
+            row = connection.execute(
+                "SELECT payload FROM results WHERE key = ? AND created >= ?",
+                (key, self._oldest_valid(now)),
+            ).fetchone()
+            if row is not None:
+                connection.execute("UPDATE results SET accessed = ? WHERE key = ?", (now, key))
+        if row is None:
+            return None
+        return decode_result(row[0])
+
+    def put(self, key: str, result: SimulationResult) -> None:
+        payload = encode_result(result)
+        now = time.time()
+        with self._connect() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO results (key, payload, size, created, accessed) VALUES (?, ?, ?, ?, ?)",
+                (key, payload, len(payload), now, now),
+            )
+            connection.execute("DELETE FROM results WHERE created < ?", (self._oldest_valid(now),))
+            # Least recently used entries go first once the payloads outgrow max_bytes.
+            connection.execute(
+                "DELETE FROM results WHERE key IN ("
+                "SELECT key FROM (SELECT key, SUM(size) OVER (ORDER BY accessed DESC, key) AS kept FROM results) "
+                "WHERE kept > ?)",
+                (self.max_bytes,),
+            )
+
+    def clear(self) -> None:
+        with self._connect() as connection:
+            connection.execute("DELETE FROM results")
+            connection.execute("DELETE FROM metrics")
+
+    def add_metrics(self, deltas: dict[str, float]) -> None:
+        with self._connect() as connection:
+            connection.executemany(
+                "INSERT INTO metrics (name, value) VALUES (?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+                list(deltas.items()),
+            )
+
+    def metric_totals(self) -> dict[str, float]:
+        with self._connect() as connection:
+            return dict(connection.execute("SELECT name, value FROM metrics").fetchall())
+
+    def ping(self) -> bool:
+        try:
+            with self._connect() as connection:
+                connection.execute("SELECT 1 FROM results LIMIT 1").fetchall()
+        except sqlite3.Error:
+            return False
+        return True
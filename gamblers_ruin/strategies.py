@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Protocol
+
+import numpy as np
+
+from .models import SimulationResult
+from .simulation import TRIAL_BATCH_SIZE, CancellationToken
+
+STRATEGY_NAMES = ("unit", "fixed-fraction", "kelly", "martingale", "bold")
+
+
+class StakeStrategy(Protocol):
+    @property
+    def name(self) -> str: ...
+
+    def stakes(self, money: np.ndarray, goal: int, last_stake: np.ndarray, last_won: np.ndarray) -> np.ndarray: ...
+
+
+@dataclass(frozen=True)
+class UnitStake:
+    name = "unit"
+
+    def stakes(self, money: np.ndarray, goal: int, last_stake: np.ndarray, last_won: np.ndarray) -> np.ndarray:
+        return np.ones_like(money)
+
+
+@dataclass(frozen=True)
+class FixedFractionStake:
+    fraction: float
+
+    @property
+    def name(self) -> str:
+        return f"fixed-fraction({self.fraction:g})"
+
+    def stakes(self, money: np.ndarray, goal: int, last_stake: np.ndarray, last_won: np.ndarray) -> np.ndarray:
+        return np.floor(self.fraction * money).astype(money.dtype)
+
+
+@dataclass(frozen=True)
+class MartingaleStake:
+    base_stake: int = 1
+    name = "martingale"
+
+    def stakes(self, money: np.ndarray, goal: int, last_stake: np.ndarray, last_won: np.ndarray) -> np.ndarray:
+        return np.where(last_won, self.base_stake, 2 * last_stake)
+
+
+@dataclass(frozen=True)
+class BoldPlayStake:
+    name = "bold"
+
+    def stakes(self, money: np.ndarray, goal: int, last_stake: np.ndarray, last_won: np.ndarray) -> np.ndarray:
+        return np.minimum(money, goal - money)
+
+
+def kelly_fraction(win_probability: float) -> float:
+    # Even-money bets: the Kelly fraction is p - q, which is only positive with an edge.
+    if win_probability <= 0.5:
+        raise ValueError("Kelly staking needs an edge (p > 0.5); without one it would stake nothing")
+    return 2.0 * win_probability - 1.0
+
+
+def make_strategy(
+    name: str,
+    win_probability: float,
+    stake_fraction: float = 0.1,
+    base_stake: int = 1,
+) -> StakeStrategy:
+    if name == "unit":
+        return UnitStake()
+    if name == "fixed-fraction":
+        return FixedFractionStake(stake_fraction)
+    if name == "kelly":
+        return FixedFractionStake(kelly_fraction(win_probability))
+    if name == "martingale":
+        return MartingaleStake(base_stake)
+    if name == "bold":
+        return BoldPlayStake()
+    raise ValueError(f"Unknown strategy {name!r}; use one of {', '.join(STRATEGY_NAMES)}")
+
+
+def run_strategy(
+    strategy: StakeStrategy,
+    start_money: int,
+    goal: int,
+    win_probability: float,
+    trials: int,
+    num_paths_to_capture: int,
+    max_steps_per_trial: int | None = None,
+    rng: np.random.Generator | None = None,
+    cancel_token: CancellationToken | None = None,
+) -> SimulationResult:
+    rng = rng or np.random.default_rng()
+    money = np.full(trials, start_money, dtype=np.int64)
+    steps = np.zeros(trials, dtype=int)
+    last_stake = np.zeros(trials, dtype=np.int64)
+    last_won = np.ones(trials, dtype=bool)
+    trajectories = [[start_money] for _ in range(min(num_paths_to_capture, trials))]
+
+    # Every round advances all unfinished trials at once; finished trials drop out of `active`.
+    active = np.arange(trials)
+    if not (0 < start_money < goal):
+        active = active[:0]
+    round_number = 0
+    while active.size:
+        if cancel_token is not None and round_number % TRIAL_BATCH_SIZE == 0:
+            cancel_token.raise_if_cancelled()
+        round_number += 1
+
+        current = money[active]
+        stake = strategy.stakes(current, goal, last_stake[active], last_won[active])
+        # Stakes are whole units, at least one and never more than the bankroll.
+        stake = np.clip(stake, 1, current)
+        won = rng.random(active.size) < win_probability
+        current = current + np.where(won, stake, -stake)
+
+        money[active] = current
+        steps[active] += 1
+        last_stake[active] = stake
+        last_won[active] = won
+
+        if trajectories:
+            for trial in active[: np.searchsorted(active, len(trajectories))]:
+                trajectories[trial].append(int(money[trial]))
+
+        still_active = (current > 0) & (current < goal)
+        if max_steps_per_trial is not None:
+            still_active &= steps[active] < max_steps_per_trial
+        active = active[still_active]
+
+    censored = (money > 0) & (money < goal)
+    return SimulationResult(
+        success=money >= goal,
+        steps=steps,
+        sample_paths=[np.array(path) for path in trajectories],
+        censored=censored,
+    )
+
+
+def compare_strategies(
+    strategies: list[StakeStrategy],
+    start_money: int,
+    goal: int,
+    win_probability: float,
+    trials: int,
+    num_paths_to_capture: int = 0,
+    max_steps_per_trial: int | None = None,
+    seed: int | None = None,
+) -> dict[str, SimulationResult]:
+    seeds = np.random.SeedSequence(seed).spawn(len(strategies))
+    return {
+        strategy.name: run_strategy(
+            strategy,
+            start_money=start_money,
+            goal=goal,
+            win_probability=win_probability,
+            trials=trials,
+            num_paths_to_capture=num_paths_to_capture,
+            max_steps_per_trial=max_steps_per_trial,
+            rng=np.random.default_rng(child),
+        )
+        for strategy, child in zip(strategies, seeds)
+    }
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+
+from .analytics import (
+    closed_form_expected_steps,
+    closed_form_goal_probability,
+    theoretical_expected_steps,
+    theoretical_goal_probability,
+)
+
+GOAL_PROBABILITY = 0
+EXPECTED_STEPS = 1
+
+
+def _theory_grid(max_goal: int, win_probability: float) -> tuple[np.ndarray, np.ndarray]:
+    starts = np.arange(max_goal + 1, dtype=np.float64)[:, None]
+    goals = np.arange(max_goal + 1, dtype=np.float64)[None, :]
+    valid = (starts > 0) & (goals > starts)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        probability = closed_form_goal_probability(starts, goals, win_probability)
+        duration = closed_form_expected_steps(starts, goals, win_probability)
+
+    probability = np.where(valid, probability, np.nan)
+    duration = np.where(valid, duration, np.nan)
+    return probability, duration
+
+
+def build_theory_table(output_file: Path, max_goal: int = 100, p_points: int = 201) -> Path:
+    if max_goal < 2:
+        raise ValueError("max_goal must be >= 2")
+    if p_points < 2:
+        raise ValueError("p_points must be >= 2")
+
+    output_file = Path(output_file)
+    table = np.lib.format.open_memmap(
+        output_file,
+        mode="w+",
+        dtype=np.float64,
+        shape=(2, p_points, max_goal + 1, max_goal + 1),
+    )
+    for index, win_probability in enumerate(np.linspace(0.0, 1.0, p_points)):
+        probability, duration = _theory_grid(max_goal, float(win_probability))
+        table[GOAL_PROBABILITY, index] = probability
+        table[EXPECTED_STEPS, index] = duration
+    table.flush()
+    del table
+    return output_file
+
+
+class TheoryTable:
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self._table = np.load(self.path, mmap_mode="r")
+        if self._table.ndim != 4 or self._table.shape[0] != 2 or self._table.shape[2] != self._table.shape[3]:
+            raise ValueError(f"{self.path} is not a theory lookup table")
+        self.p_points = self._table.shape[1]
+        self.max_goal = self._table.shape[2] - 1
+
+    def goal_probability(self, start_money: int, goal: int, win_probability: float) -> float:
+        if goal > self.max_goal:
+            return theoretical_goal_probability(start_money, goal, win_probability)
+        return self._interpolate(GOAL_PROBABILITY, start_money, goal, win_probability)
+
+    def expected_steps(self, start_money: int, goal: int, win_probability: float) -> float:
+        if goal > self.max_goal:
+            return theoretical_expected_steps(start_money, goal, win_probability)
+        return self._interpolate(EXPECTED_STEPS, start_money, goal, win_probability)
+
+    def _interpolate(self, kind: int, start_money: int, goal: int, win_probability: float) -> float:
+        if start_money <= 0 or goal <= start_money:
+            raise ValueError("Require 0 < start_money < goal")
+        if not (0.0 <= win_probability <= 1.0):
+            raise ValueError("win_probability must be in [0, 1]")
+
+        position = win_probability * (self.p_points - 1)
+        lower = min(int(position), self.p_points - 2)
+        weight = position - lower
+        below = self._table[kind, lower, start_money, goal]
+        above = self._table[kind, lower + 1, start_money, goal]
+        return float((1.0 - weight) * below + weight * above)
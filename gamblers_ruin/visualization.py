@@ -5,13 +5,17 @@ import numpy as np
 from .analytics import (
     absolute_convergence_error,
     average_steps,
+    bounds_error,
+    censored_count,
     estimated_goal_probability,
     estimator_variance_decay,
+    goal_probability_bounds,
     probability_convergence,
     ruin_count,
     success_count,
     theoretical_goal_probability,
 )
+from .instrumentation import StageTimings, timed_stage
 from .models import SimulationResult
 
 try:
@@ -27,13 +31,23 @@ def build_figure(
     goal: int,
     win_probability: float,
     target_config_results: list[dict[str, float | int]] | None = None,
+    timings: StageTimings | None = None,
 ):
-    convergence = probability_convergence(result)
-    theoretical_probability = theoretical_goal_probability(start_money, goal, win_probability)
-    absolute_error = absolute_convergence_error(result, theoretical_probability)
-    variance_decay = estimator_variance_decay(result)
-    success_steps = result.steps[result.success]
-    fail_steps = result.steps[~result.success]
+    with timed_stage(timings, "analytics"):
+        convergence = probability_convergence(result)
+        theoretical_probability = theoretical_goal_probability(start_money, goal, win_probability)
+        absolute_error = absolute_convergence_error(result, theoretical_probability)
+        variance_decay = estimator_variance_decay(result)
+        success_steps = result.steps[result.success]
+        fail_steps = result.steps[~result.success & ~result.censored]
+        censored_steps = result.steps[result.censored]
+        wins = success_count(result)
+        losses = ruin_count(result)
+        censored = censored_count(result)
+        lower_bound, upper_bound = goal_probability_bounds(result)
+        est_prob = estimated_goal_probability(result)
+        avg_steps = average_steps(result)
+        final_error = bounds_error(lower_bound, upper_bound, theoretical_probability)
 
     fig = make_subplots(
         rows=3,
@@ -120,13 +134,18 @@ def build_figure(
         col=2,
     )
 
-    wins = success_count(result)
-    losses = ruin_count(result)
+    outcome_labels = ["Reached Goal", "Ruined"]
+    outcome_values = [wins, losses]
+    outcome_colors = ["seagreen", "crimson"]
+    if censored > 0:
+        outcome_labels.append("Censored")
+        outcome_values.append(censored)
+        outcome_colors.append("gray")
     fig.add_trace(
         go.Pie(
-            labels=["Reached Goal", "Ruined"],
-            values=[wins, losses],
-            marker=dict(colors=["seagreen", "crimson"]),
+            labels=outcome_labels,
+            values=outcome_values,
+            marker=dict(colors=outcome_colors),
             textinfo="label+percent",
             hole=0.35,
             showlegend=False,
@@ -159,10 +178,18 @@ def build_figure(
             row=3,
             col=1,
         )
-
-    est_prob = estimated_goal_probability(result)
-    avg_steps = average_steps(result)
-    final_error = abs(est_prob - theoretical_probability)
+    if len(censored_steps) > 0:
+        fig.add_trace(
+            go.Histogram(
+                x=censored_steps,
+                name="Censored",
+                opacity=0.6,
+                marker_color="gray",
+                nbinsx=40,
+            ),
+            row=3,
+            col=1,
+        )
 
     extra_title = ""
     if target_config_results:
@@ -171,6 +198,11 @@ def build_figure(
             for item in target_config_results
         )
         extra_title = f"<br><sup>Target configurations: {labels}</sup>"
+    if censored > 0:
+        extra_title += (
+            f"<br><sup>censored={censored:,} trials hit the step cap; "
+            f"P(reach goal) in [{lower_bound:.4f}, {upper_bound:.4f}], avg steps is a lower bound</sup>"
+        )
 
     fig.update_layout(
         title=(
@@ -1,18 +1,40 @@
 from __future__ import annotations
 
 import platform
+import select
+import socket
 import subprocess
 import threading
+import time
+from pathlib import Path
+from typing import Any
+
+import numpy as np
 
 try:
-    from flask import Flask, render_template_string, request
+    from flask import Flask, Response, g, jsonify, render_template_string, request
 except ImportError as exc:
     raise SystemExit("Missing dependency: flask. Install it with: pip install flask") from exc
 
-from .analytics import estimated_goal_probability, theoretical_goal_probability
-from .simulation import run_gamblers_ruin
+from .analytics import (
+    bounds_error,
+    censored_count,
+    estimated_goal_probability,
+    goal_probability_bounds,
+    theoretical_expected_steps,
+    theoretical_goal_probability,
+)
+from .coalescing import RequestCoalescer
+from .instrumentation import REGISTRY, StageTimings
+from .models import SimulationResult
+from .sampling import PATH_SAMPLING_METHODS, make_path_selector
+from .simulation import CancellationToken, run_gamblers_ruin
+from .store import DEFAULT_STORE_PATH, ResultStore, result_key
+from .theory_table import TheoryTable
 from .visualization import build_figure
 
+MAX_TARGET_GOALS = 10
+
 PAGE_TEMPLATE = """
 <!doctype html>
 <html lang="en">
@@ -55,7 +77,7 @@ PAGE_TEMPLATE = """
       border: 1px solid var(--line);
     }
     label { display: flex; flex-direction: column; font-size: 0.85rem; color: #3a4451; min-width: 0; }
-    input {
+    input, select {
       width: 100%;
       margin-top: 0.25rem;
       padding: 0.55rem 0.6rem;
@@ -153,6 +175,19 @@ PAGE_TEMPLATE = """
     <label>Target goals (comma-separated)
       <input type="text" name="target_goals" value="{{ params.target_goals }}">
     </label>
+    <label>Max steps per trial (blank = no cap)
+      <input type="number" min="1" name="max_steps" value="{{ params.max_steps }}">
+    </label>
+    <label>Total step budget (blank = no cap)
+      <input type="number" min="1" name="step_budget" value="{{ params.step_budget }}">
+    </label>
+    <label>Path sampling
+      <select name="path_sampling">
+        {% for method in path_sampling_methods %}
+          <option value="{{ method }}" {% if method == params.path_sampling %}selected{% endif %}>{{ method }}</option>
+        {% endfor %}
+      </select>
+    </label>
     <button type="submit">Run Simulation</button>
   </form>
 
@@ -160,8 +195,12 @@ PAGE_TEMPLATE = """
     <div class="metrics">
       <div class="card">Empirical P(reach goal)<b>{{ metrics.empirical }}</b></div>
       <div class="card">Closed-form P(reach goal)<b>{{ metrics.theoretical }}</b></div>
-      <div class="card">Absolute error<b>{{ metrics.error }}</b></div>
+      <div class="card">{% if metrics.censored %}Distance to bounds{% else %}Absolute error{% endif %}<b>{{ metrics.error }}</b></div>
       <div class="card">Trials<b>{{ metrics.trials }}</b></div>
+      {% if metrics.censored %}
+        <div class="card">Censored trials<b>{{ metrics.censored }}</b></div>
+        <div class="card">P(reach goal) bounds<b>{{ metrics.bounds }}</b></div>
+      {% endif %}
     </div>
     <div class="table-wrap">
     <table>
@@ -180,6 +219,13 @@ PAGE_TEMPLATE = """
       </tbody>
     </table>
     </div>
+    {% if metrics.censored or metrics.targets_censored %}
+      <p class="sub">Some trials hit a step cap, so errors are measured from the closed form to the
+        [lower, upper] range the probability must lie in, not to the lower-bound estimate.</p>
+    {% endif %}
+    {% if metrics.skipped_targets %}
+      <p class="sub">Step budget spent before target goals {{ metrics.skipped_targets }} could run.</p>
+    {% endif %}
     <div class="figure-wrap">{{ figure_html|safe }}</div>
   {% endif %}
   </div>
@@ -253,24 +299,105 @@ def _parse_target_goals(raw: str, start: int, goal: int) -> list[int]:
         values.append(val)
     if not values:
         raise ValueError("At least one valid target goal must be greater than start bankroll.")
+    if len(set(values)) > MAX_TARGET_GOALS:
+        raise ValueError(f"At most {MAX_TARGET_GOALS} target goals per request.")
     return sorted(set(values))
 
 
+def _parse_optional_limit(raw: str, label: str) -> int | None:
+    if not raw.strip():
+        return None
+    value = int(raw)
+    if value <= 0:
+        raise ValueError(f"{label} must be > 0 when set.")
+    return value
+
+
+def _simulate(
+    store: ResultStore | None,
+    timings: StageTimings,
+    start_money: int,
+    goal: int,
+    win_probability: float,
+    trials: int,
+    num_paths_to_capture: int,
+    cancel_token: CancellationToken | None = None,
+    max_steps_per_trial: int | None = None,
+    total_step_budget: int | None = None,
+    path_sampling: str = "first",
+) -> SimulationResult:
+    key = result_key(
+        start_money,
+        goal,
+        win_probability,
+        trials,
+        num_paths_to_capture,
+        max_steps_per_trial,
+        total_step_budget,
+        path_sampling,
+    )
+    if store is not None:
+        with timings.stage("store"):
+            cached = store.get(key)
+        if cached is not None:
+            REGISTRY.increment("cache_hits")
+            return cached
+        REGISTRY.increment("cache_misses")
+
+    with timings.stage("simulate"):
+        started = time.perf_counter()
+        rng = np.random.default_rng()
+        result = run_gamblers_ruin(
+            start_money=start_money,
+            goal=goal,
+            win_probability=win_probability,
+            trials=trials,
+            num_paths_to_capture=num_paths_to_capture,
+            cancel_token=cancel_token,
+            max_steps_per_trial=max_steps_per_trial,
+            total_step_budget=total_step_budget,
+            rng=rng,
+            path_selector=make_path_selector(path_sampling, num_paths_to_capture, rng),
+        )
+        REGISTRY.record_simulation(result, time.perf_counter() - started)
+    if store is not None:
+        with timings.stage("store"):
+            store.put(key, result)
+    return result
+
+
 def _run_target_configurations(
+    store: ResultStore | None,
+    timings: StageTimings,
     start_money: int,
     goals: list[int],
     win_probability: float,
     trials: int,
+    cancel_token: CancellationToken | None = None,
+    max_steps_per_trial: int | None = None,
+    total_step_budget: int | None = None,
 ) -> list[dict[str, float | int]]:
+    # total_step_budget is what is left of the request's budget; goals that find it spent are
+    # left out of the rows.
     rows: list[dict[str, float | int]] = []
+    remaining_budget = total_step_budget
     for configured_goal in goals:
-        scenario_result = run_gamblers_ruin(
+        if remaining_budget is not None and remaining_budget <= 0:
+            break
+        scenario_result = _simulate(
+            store,
+            timings,
             start_money=start_money,
             goal=configured_goal,
             win_probability=win_probability,
             trials=trials,
             num_paths_to_capture=0,
+            cancel_token=cancel_token,
+            max_steps_per_trial=max_steps_per_trial,
+            total_step_budget=remaining_budget,
         )
+        if remaining_budget is not None:
+            remaining_budget -= int(scenario_result.steps.sum())
         empirical = estimated_goal_probability(scenario_result)
         theoretical = theoretical_goal_probability(start_money, configured_goal, win_probability)
         rows.append(
@@ -278,24 +405,195 @@ def _run_target_configurations(
                 "goal": configured_goal,
                 "empirical": empirical,
                 "theoretical": theoretical,
-                "error": abs(empirical - theoretical),
+                "error": bounds_error(*goal_probability_bounds(scenario_result), theoretical),
+                "censored": censored_count(scenario_result),
             }
         )
     return rows
 
 
-def serve_dashboard(
-    host: str,
-    port: int,
-    open_browser: bool,
+def _build_dashboard_payload(
+    store: ResultStore | None,
+    start_money: int,
+    goal: int,
+    win_probability: float,
+    trials: int,
+    paths: int,
+    target_goals: list[int],
+    cancel_token: CancellationToken,
+    max_steps_per_trial: int | None = None,
+    total_step_budget: int | None = None,
+    path_sampling: str = "first",
+) -> dict[str, Any]:
+    timings = StageTimings()
+    # One step budget covers the whole request: the main run draws on it first and the
+    # target goals share whatever is left.
+    main_result = _simulate(
+        store,
+        timings,
+        start_money=start_money,
+        goal=goal,
+        win_probability=win_probability,
+        trials=trials,
+        num_paths_to_capture=min(paths, trials),
+        cancel_token=cancel_token,
+        max_steps_per_trial=max_steps_per_trial,
+        total_step_budget=total_step_budget,
+        path_sampling=path_sampling,
+    )
+    remaining_budget = None if total_step_budget is None else total_step_budget - int(main_result.steps.sum())
+    target_config_results = _run_target_configurations(
+        store,
+        timings,
+        start_money=start_money,
+        goals=target_goals,
+        win_probability=win_probability,
+        trials=trials,
+        cancel_token=cancel_token,
+        max_steps_per_trial=max_steps_per_trial,
+        total_step_budget=remaining_budget,
+    )
+
+    with timings.stage("analytics"):
+        empirical = estimated_goal_probability(main_result)
+        theoretical = theoretical_goal_probability(start_money, goal, win_probability)
+        censored = censored_count(main_result)
+        lower_bound, upper_bound = goal_probability_bounds(main_result)
+        abs_error = bounds_error(lower_bound, upper_bound, theoretical)
+
+    completed_trials = len(main_result.success)
+    metrics = {
+        "empirical": f"{empirical:.4f}",
+        "theoretical": f"{theoretical:.4f}",
+        "error": f"{abs_error:.4f}",
+        "trials": f"{completed_trials:,}" if completed_trials == trials else f"{completed_trials:,} of {trials:,}",
+        "censored": f"{censored:,}" if censored else "",
+        "bounds": f"[{lower_bound:.4f}, {upper_bound:.4f}]",
+        "targets_censored": "yes" if any(item["censored"] for item in target_config_results) else "",
+        "skipped_targets": ", ".join(str(target) for target in target_goals[len(target_config_results) :]),
+    }
+    target_rows = [
+        {
+            "goal": f"{int(item['goal'])}",
+            "empirical": f"{item['empirical']:.4f}",
+            "theoretical": f"{item['theoretical']:.4f}",
+            "error": f"{item['error']:.4f}",
+        }
+        for item in target_config_results
+    ]
+
+    cancel_token.raise_if_cancelled()
+    with timings.stage("build_figure"):
+        figure = build_figure(
+            result=main_result,
+            start_money=start_money,
+            goal=goal,
+            win_probability=win_probability,
+            target_config_results=target_config_results,
+            timings=timings,
+        )
+    with timings.stage("to_html"):
+        figure_html = figure.to_html(
+            include_plotlyjs="cdn",
+            full_html=False,
+            config={"responsive": True, "displaylogo": False},
+            default_width="100%",
+        )
+
+    return {
+        "metrics": metrics,
+        "target_rows": target_rows,
+        "figure_html": figure_html,
+        "durations": dict(timings.durations),
+    }
+
+
+def _client_disconnected(environ: dict[str, Any]) -> bool:
+    connection = environ.get("gunicorn.socket") or environ.get("werkzeug.socket")
+    if connection is None:
+        return False
+    try:
+        readable, _, _ = select.select([connection], [], [], 0)
+        if not readable:
+            return False
+        # A readable socket with nothing to peek at means the peer closed its end.
+        return connection.recv(1, socket.MSG_PEEK) == b""
+    except (OSError, ValueError):
+        return True
+
+
+def create_app(
     default_start: int,
     default_goal: int,
     default_p: float,
     default_trials: int,
     default_paths: int,
     default_target_goals: str,
-) -> None:
+    store: ResultStore | None = None,
+    request_timeout: float | None = None,
+    default_max_steps: int | None = None,
+    default_step_budget: int | None = None,
+    theory: TheoryTable | None = None,
+    default_path_sampling: str = "first",
+    shared_metrics: bool = False,
+) -> Flask:
+    if shared_metrics and store is None:
+        raise ValueError("shared_metrics needs a result store to aggregate into")
     app = Flask(__name__)
+    coalescer = RequestCoalescer()
+
+    @app.get("/healthz")
+    def healthz():
+        return jsonify(status="ok")
+
+    @app.get("/readyz")
+    def readyz():
+        if store is not None and not store.ping():
+            return jsonify(status="unavailable", store=str(store.path)), 503
+        return jsonify(status="ready")
+
+    @app.get("/api/theory")
+    def theory_endpoint():
+        try:
+            start_money = int(request.args.get("start", ""))
+            goal = int(request.args.get("goal", ""))
+            win_probability = float(request.args.get("p", ""))
+            if theory is not None:
+                goal_probability = theory.goal_probability(start_money, goal, win_probability)
+                expected_steps = theory.expected_steps(start_money, goal, win_probability)
+            else:
+                goal_probability = theoretical_goal_probability(start_money, goal, win_probability)
+                expected_steps = theoretical_expected_steps(start_money, goal, win_probability)
+        except (TypeError, ValueError) as exc:
+            return jsonify(error=str(exc)), 400
+        except ArithmeticError as exc:
+            return jsonify(error=f"Cannot evaluate the closed form for these parameters: {exc}"), 400
+        return jsonify(
+            start=start_money,
+            goal=goal,
+            p=win_probability,
+            goal_probability=goal_probability,
+            expected_steps=expected_steps,
+            source="interpolated" if theory is not None and goal <= theory.max_goal else "direct",
+        )
+
+    @app.get("/metrics")
+    def metrics_endpoint():
+        if shared_metrics:
+            # Prefork workers each keep their own registry, so scrapes read the totals they
+            # all add into the shared store instead of whichever worker answered.
+            REGISTRY.flush_to(store)
+            return Response(REGISTRY.render_prometheus(store.metric_totals()), mimetype="text/plain; version=0.0.4")
+        return Response(REGISTRY.render_prometheus(), mimetype="text/plain; version=0.0.4")
+
+    @app.after_request
+    def add_server_timing(response):
+        timings = g.get("timings")
+        if timings is not None and timings.durations:
+            response.headers["Server-Timing"] = timings.server_timing_header()
+        if shared_metrics:
+            REGISTRY.flush_to(store)
+        return response
 
     @app.get("/")
     def index():
@@ -306,9 +604,16 @@ def serve_dashboard(
             "trials": request.args.get("trials", str(default_trials)),
             "paths": request.args.get("paths", str(default_paths)),
             "target_goals": request.args.get("target_goals", default_target_goals),
+            "max_steps": request.args.get("max_steps", "" if default_max_steps is None else str(default_max_steps)),
+            "step_budget": request.args.get(
+                "step_budget", "" if default_step_budget is None else str(default_step_budget)
+            ),
+            "path_sampling": request.args.get("path_sampling", default_path_sampling),
         }
 
+        timings = g.timings = StageTimings()
         error = ""
+        status = 200
         metrics: dict[str, str] | None = None
         target_rows: list[dict[str, str]] = []
         figure_html = ""
@@ -319,6 +624,11 @@ def serve_dashboard(
             win_probability = float(params["p"])
             trials = int(params["trials"])
             paths = int(params["paths"])
+            max_steps = _parse_optional_limit(params["max_steps"], "Max steps per trial")
+            step_budget = _parse_optional_limit(params["step_budget"], "Total step budget")
+            path_sampling = params["path_sampling"]
+            if path_sampling not in PATH_SAMPLING_METHODS:
+                raise ValueError(f"Path sampling must be one of: {', '.join(PATH_SAMPLING_METHODS)}.")
 
             if start_money <= 0:
                 raise ValueError("Start bankroll must be > 0.")
@@ -332,69 +642,134 @@ def serve_dashboard(
                 raise ValueError("Sample paths must be >= 0.")
 
             target_goals = _parse_target_goals(params["target_goals"], start_money, goal)
-            target_config_results = _run_target_configurations(
-                start_money=start_money,
-                goals=target_goals,
-                win_probability=win_probability,
-                trials=trials,
-            )
-
-            main_result = run_gamblers_ruin(
-                start_money=start_money,
-                goal=goal,
-                win_probability=win_probability,
-                trials=trials,
-                num_paths_to_capture=min(paths, trials),
-            )
-            empirical = estimated_goal_probability(main_result)
-            theoretical = theoretical_goal_probability(start_money, goal, win_probability)
-            abs_error = abs(empirical - theoretical)
-
-            metrics = {
-                "empirical": f"{empirical:.4f}",
-                "theoretical": f"{theoretical:.4f}",
-                "error": f"{abs_error:.4f}",
-                "trials": f"{trials:,}",
-            }
-            target_rows = [
-                {
-                    "goal": f"{int(item['goal'])}",
-                    "empirical": f"{item['empirical']:.4f}",
-                    "theoretical": f"{item['theoretical']:.4f}",
-                    "error": f"{item['error']:.4f}",
-                }
-                for item in target_config_results
-            ]
-
-            figure = build_figure(
-                result=main_result,
-                start_money=start_money,
-                goal=goal,
-                win_probability=win_probability,
-                target_config_results=target_config_results,
+            key = (
+                start_money,
+                goal,
+                win_probability,
+                trials,
+                paths,
+                tuple(target_goals),
+                max_steps,
+                step_budget,
+                path_sampling,
             )
-            figure_html = figure.to_html(
-                include_plotlyjs="cdn",
-                full_html=False,
-                config={"responsive": True, "displaylogo": False},
-                default_width="100%",
+            deadline = time.monotonic() + request_timeout if request_timeout is not None else None
+            environ = request.environ
+            payload, coalesced = coalescer.run(
+                key,
+                lambda cancel_token: _build_dashboard_payload(
+                    store,
+                    start_money=start_money,
+                    goal=goal,
+                    win_probability=win_probability,
+                    trials=trials,
+                    paths=paths,
+                    target_goals=target_goals,
+                    cancel_token=cancel_token,
+                    max_steps_per_trial=max_steps,
+                    total_step_budget=step_budget,
+                    path_sampling=path_sampling,
+                ),
+                deadline=deadline,
+                disconnected=lambda: _client_disconnected(environ),
             )
+            timings.durations.update(payload["durations"])
+            if coalesced:
+                timings.durations["coalesced"] = 0.0
+            metrics = payload["metrics"]
+            target_rows = payload["target_rows"]
+            figure_html = payload["figure_html"]
+        except ConnectionAbortedError:
+            return Response(status=499)
+        except TimeoutError as exc:
+            error = str(exc)
+            status = 504
         except (TypeError, ValueError) as exc:
             error = str(exc)
 
-        return render_template_string(
-            PAGE_TEMPLATE,
-            params=params,
-            error=error,
-            metrics=metrics,
-            target_rows=target_rows,
-            figure_html=figure_html,
-        )
+        with timings.stage("render"):
+            return render_template_string(
+                PAGE_TEMPLATE,
+                params=params,
+                error=error,
+                metrics=metrics,
+                target_rows=target_rows,
+                figure_html=figure_html,
+                path_sampling_methods=PATH_SAMPLING_METHODS,
+            ), status
+
+    return app
+
+
+def _run_prefork(app: Flask, host: str, port: int, workers: int) -> None:
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError as exc:
+        raise SystemExit("Missing dependency: gunicorn. Install it with: pip install gunicorn") from exc
+
+    class DashboardApplication(BaseApplication):
+        def load_config(self) -> None:
+            self.cfg.set("bind", f"{host}:{port}")
+            self.cfg.set("workers", workers)
+            self.cfg.set("threads", 4)
+            self.cfg.set("timeout", 300)
+
+        def load(self) -> Flask:
+            return app
+
+    DashboardApplication().run()
+
+
+def serve_dashboard(
+    host: str,
+    port: int,
+    open_browser: bool,
+    default_start: int,
+    default_goal: int,
+    default_p: float,
+    default_trials: int,
+    default_paths: int,
+    default_target_goals: str,
+    workers: int = 1,
+    store_path: Path | None = None,
+    request_timeout: float | None = None,
+    default_max_steps: int | None = None,
+    default_step_budget: int | None = None,
+    theory_table_path: Path | None = None,
+    default_path_sampling: str = "first",
+) -> None:
+    if store_path is None and workers > 1:
+        store_path = DEFAULT_STORE_PATH
+    store = ResultStore(store_path) if store_path is not None else None
+
+    app = create_app(
+        default_start=default_start,
+        default_goal=default_goal,
+        default_p=default_p,
+        default_trials=default_trials,
+        default_paths=default_paths,
+        default_target_goals=default_target_goals,
+        store=store,
+        request_timeout=request_timeout,
+        default_max_steps=default_max_steps,
+        default_step_budget=default_step_budget,
+        theory=TheoryTable(theory_table_path) if theory_table_path is not None else None,
+        default_path_sampling=default_path_sampling,
+        shared_metrics=workers > 1,
+    )
+    if store is not None:
+        # Every start draws fresh Monte Carlo samples instead of replaying the last run's.
+        store.clear()
 
     dashboard_url = f"http://{host}:{port}"
     if open_browser:
         threading.Timer(0.8, _open_target_with_notice, args=[dashboard_url]).start()
 
     print(f"Serving dashboard at: {dashboard_url}")
+    if store is not None:
+        print(f"Sharing simulation results through: {store.path}")
     print("Press Ctrl+C to stop the server.")
-    app.run(host=host, port=port, debug=False, use_reloader=False)
+    if workers > 1:
+        _run_prefork(app, host=host, port=port, workers=workers)
+    else:
+        app.run(host=host, port=port, debug=False, use_reloader=False)
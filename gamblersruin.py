@@ -1,23 +1,199 @@
 from __future__ import annotations
 
-from gamblers_ruin.analytics import theoretical_goal_probability
-from gamblers_ruin.cli import parse_args, validate_args
+import cProfile
+import json
+import sys
+import time
+
+import numpy as np
+
+from gamblers_ruin.analytics import bounds_error, censored_count, goal_probability_bounds, theoretical_goal_probability
+from gamblers_ruin.batch import TrialSummary, load_manifest, run_batch, scenario_row
+from gamblers_ruin.cli import (
+    parse_args,
+    parse_batch_args,
+    parse_coordinator_args,
+    parse_theory_table_args,
+    parse_verify_engines_args,
+    parse_worker_args,
+    validate_args,
+    validate_batch_args,
+    validate_coordinator_args,
+    validate_theory_table_args,
+    validate_verify_engines_args,
+    validate_worker_args,
+)
 from gamblers_ruin.dashboard import build_dashboard
+from gamblers_ruin.distributed import run_coordinator, spawn_local_workers
+from gamblers_ruin.equivalence import run_equivalence_suite, vectorized_unit_engine
+from gamblers_ruin.export import open_exporter
+from gamblers_ruin.instrumentation import StageTimings, timed_stage
+from gamblers_ruin.sampling import make_path_selector
 from gamblers_ruin.simulation import run_gamblers_ruin
+from gamblers_ruin.strategies import make_strategy, run_strategy
+from gamblers_ruin.theory_table import build_theory_table
 from gamblers_ruin.webapp import serve_dashboard
 
 
+def build_theory_table_main(argv: list[str]) -> None:
+    args = parse_theory_table_args(argv)
+    validate_theory_table_args(args)
+    started = time.perf_counter()
+    output_file = build_theory_table(args.output, max_goal=args.max_goal, p_points=args.p_points)
+    size_mb = output_file.stat().st_size / 1e6
+    print(f"Theory table written to: {output_file.resolve()} ({size_mb:.1f} MB)")
+    print(f"Built in {time.perf_counter() - started:.2f}s for goals up to {args.max_goal} and {args.p_points} p values")
+
+
+def batch_main(argv: list[str]) -> None:
+    args = parse_batch_args(argv)
+    validate_batch_args(args)
+    try:
+        scenarios = load_manifest(args.manifest)
+    except ValueError as exc:
+        raise SystemExit(str(exc)) from exc
+
+    def report(row: dict) -> None:
+        print(
+            f"{row['name']}: empirical={row['empirical']:.6f}, closed-form={row['theoretical']:.6f}, "
+            f"error={row['error']:.6f}, avg steps={row['avg_steps']:.1f}"
+        )
+
+    started = time.perf_counter()
+    try:
+        completed = run_batch(
+            scenarios,
+            output_file=args.output,
+            workers=args.workers,
+            batch_trials=args.batch_trials,
+            checkpoint_file=args.checkpoint,
+            on_scenario_done=report,
+        )
+    except ValueError as exc:
+        raise SystemExit(str(exc)) from exc
+    print(f"Finished {completed} of {len(scenarios)} scenarios in {time.perf_counter() - started:.2f}s")
+    print(f"Results written to: {args.output.resolve()}")
+
+
+def verify_engines_main(argv: list[str]) -> None:
+    args = parse_verify_engines_args(argv)
+    validate_verify_engines_args(args)
+    report = run_equivalence_suite(
+        {"vectorized": vectorized_unit_engine},
+        trials=args.trials,
+        alpha=args.alpha,
+        seed=args.seed,
+    )
+    print(report.format())
+    if not report.passed:
+        raise SystemExit(f"{len(report.failures())} equivalence checks failed")
+    print("All engines match the reference distribution.")
+
+
+def coordinator_main(argv: list[str]) -> None:
+    args = parse_coordinator_args(argv)
+    validate_coordinator_args(args)
+    try:
+        scenarios = load_manifest(args.manifest)
+    except ValueError as exc:
+        raise SystemExit(str(exc)) from exc
+
+    started = time.perf_counter()
+    try:
+        results = run_coordinator(
+            scenarios,
+            args.authkey.encode(),
+            host=args.host,
+            port=args.port,
+            seed=args.seed,
+            shard_trials=args.shard_trials,
+            local_workers=args.local_workers,
+            lease_timeout=args.lease_timeout,
+            max_attempts=args.max_attempts,
+        )
+    except RuntimeError as exc:
+        raise SystemExit(str(exc)) from exc
+    with args.output.open("w") as output:
+        for scenario, result in zip(scenarios, results):
+            row = scenario_row(scenario, TrialSummary.from_result(result))
+            output.write(json.dumps(row) + "\n")
+            print(
+                f"{row['name']}: empirical={row['empirical']:.6f}, closed-form={row['theoretical']:.6f}, "
+                f"error={row['error']:.6f}, avg steps={row['avg_steps']:.1f}"
+            )
+    print(f"Merged {len(results)} scenarios in {time.perf_counter() - started:.2f}s")
+    print(f"Results written to: {args.output.resolve()}")
+
+
+def worker_main(argv: list[str]) -> None:
+    args = parse_worker_args(argv)
+    validate_worker_args(args)
+    print(f"Starting {args.processes} worker processes for coordinator {args.host}:{args.port}")
+    processes = spawn_local_workers(args.processes, args.authkey.encode(), host=args.host, port=args.port)
+    for process in processes:
+        process.join()
+
+
 def main() -> None:
+    if sys.argv[1:2] == ["build-theory-table"]:
+        build_theory_table_main(sys.argv[2:])
+        return
+    if sys.argv[1:2] == ["batch"]:
+        batch_main(sys.argv[2:])
+        return
+    if sys.argv[1:2] == ["verify-engines"]:
+        verify_engines_main(sys.argv[2:])
+        return
+    if sys.argv[1:2] == ["coordinator"]:
+        coordinator_main(sys.argv[2:])
+        return
+    if sys.argv[1:2] == ["worker"]:
+        worker_main(sys.argv[2:])
+        return
+
     args = parse_args()
     validate_args(args)
 
-    result = run_gamblers_ruin(
-        start_money=args.start,
-        goal=args.goal,
-        win_probability=args.p,
-        trials=args.trials,
-        num_paths_to_capture=min(args.paths, args.trials),
-    )
+    profile = args.profile or args.profile_output is not None
+    timings = StageTimings() if profile else None
+    profiler = cProfile.Profile() if args.profile_output is not None else None
+    if profiler is not None:
+        profiler.enable()
+
+    # One generator drives both the walks and the random path selectors, so --seed reproduces both.
+    rng = np.random.default_rng(args.seed)
+    exporter = open_exporter(args.export) if args.export is not None else None
+    try:
+        with timed_stage(timings, "simulate"):
+            started = time.perf_counter()
+            if args.strategy == "unit":
+                result = run_gamblers_ruin(
+                    start_money=args.start,
+                    goal=args.goal,
+                    win_probability=args.p,
+                    trials=args.trials,
+                    num_paths_to_capture=min(args.paths, args.trials),
+                    max_steps_per_trial=args.max_steps,
+                    total_step_budget=args.step_budget,
+                    rng=rng,
+                    sink=exporter,
+                    path_selector=make_path_selector(args.path_sampling, min(args.paths, args.trials), rng),
+                )
+            else:
+                result = run_strategy(
+                    make_strategy(args.strategy, args.p, args.stake_fraction, args.base_stake),
+                    start_money=args.start,
+                    goal=args.goal,
+                    win_probability=args.p,
+                    trials=args.trials,
+                    num_paths_to_capture=min(args.paths, args.trials),
+                    max_steps_per_trial=args.max_steps,
+                    rng=rng,
+                )
+            simulation_seconds = time.perf_counter() - started
+    finally:
+        if exporter is not None:
+            exporter.close()
 
     build_dashboard(
         result=result,
@@ -25,16 +201,41 @@ def main() -> None:
         goal=args.goal,
         win_probability=args.p,
         output_file=args.output,
+        timings=timings,
     )
 
+    if profiler is not None:
+        profiler.disable()
+        profiler.dump_stats(str(args.profile_output))
+
     estimated_prob = float(result.success.mean())
     theoretical_prob = theoretical_goal_probability(args.start, args.goal, args.p)
-    abs_error = abs(estimated_prob - theoretical_prob)
+    lower_bound, upper_bound = goal_probability_bounds(result)
+    censored = censored_count(result)
 
     print(f"Estimated probability of reaching goal: {estimated_prob:.6f}")
     print(f"Closed-form probability of reaching goal: {theoretical_prob:.6f}")
-    print(f"Absolute error: {abs_error:.6f}")
+    if args.strategy != "unit":
+        print(f"Note: the closed form assumes unit stakes; the {args.strategy} strategy changes the odds.")
+    if censored:
+        print(f"Censored trials: {censored:,} of {len(result.success):,}")
+        print(f"Probability of reaching goal is within: [{lower_bound:.6f}, {upper_bound:.6f}]")
+        print(f"Closed form distance to that range: {bounds_error(lower_bound, upper_bound, theoretical_prob):.6f}")
+    else:
+        print(f"Absolute error: {abs(estimated_prob - theoretical_prob):.6f}")
     print(f"Dashboard written to: {args.output.resolve()}")
+    if exporter is not None:
+        print(f"Exported {exporter.trials_written:,} trials to: {exporter.output_file.resolve()}")
+        if exporter.paths_written:
+            print(f"Exported {exporter.paths_written} sample paths to: {exporter.paths_file.resolve()}")
+
+    if timings is not None:
+        total_steps = int(result.steps.sum())
+        print("Stage breakdown:")
+        print(timings.breakdown())
+        print(f"Simulation throughput: {len(result.success) / simulation_seconds:,.0f} trials/s, {total_steps / simulation_seconds:,.0f} steps/s")
+        if profiler is not None:
+            print(f"cProfile statistics written to: {args.profile_output.resolve()}")
 
     if args.no_serve:
         return
@@ -49,6 +250,13 @@ def main() -> None:
         default_trials=args.trials,
         default_paths=args.paths,
         default_target_goals=args.target_goals,
+        workers=args.workers,
+        store_path=args.result_store,
+        request_timeout=args.request_timeout,
+        default_max_steps=args.max_steps,
+        default_step_budget=args.step_budget,
+        theory_table_path=args.theory_table,
+        default_path_sampling=args.path_sampling,
     )
 
 
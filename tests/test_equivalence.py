@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+import numpy as np
+
+from gamblers_ruin.equivalence import reference_engine, run_equivalence_suite, vectorized_unit_engine
+from gamblers_ruin.models import SimulationResult
+
+
+def biased_engine(
+    start_money: int,
+    goal: int,
+    win_probability: float,
+    trials: int,
+    rng: np.random.Generator,
+) -> SimulationResult:
+    return reference_engine(start_money, goal, win_probability + 0.01, trials, rng)
+
+
+def test_vectorized_engine_matches_reference() -> None:
+    report = run_equivalence_suite({"vectorized": vectorized_unit_engine}, seed=0)
+    assert report.passed, report.format()
+
+
+def test_biased_engine_is_rejected() -> None:
+    report = run_equivalence_suite({"biased": biased_engine}, seed=0)
+    assert not report.passed
+    assert all(check.engine == "biased" for check in report.failures())